@@ -21,6 +21,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from core.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls, name='admin'),
@@ -30,6 +31,7 @@ urlpatterns = [
     path("goals/", include("goals.urls"), name='goals'),
     path('bot/', include('tgbot.urls'), name='bot'),
     path('oauth/', include("social_django.urls", namespace="social")),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
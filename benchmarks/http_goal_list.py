@@ -0,0 +1,70 @@
+"""Нагрузочный замер GET /goals/goal/list: запросы в секунду и задержки.
+
+Запустите сервер с нужным режимом соединений и прогоните замер для каждого режима:
+
+    DB_CONN_MODE=per_request gunicorn Todolist.wsgi:application --workers 3
+    python benchmarks/http_goal_list.py --user bench --password secret
+
+    DB_CONN_MODE=persistent gunicorn Todolist.wsgi:application --workers 3
+    python benchmarks/http_goal_list.py --user bench --password secret
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+
+def login(base_url: str, username: str, password: str) -> requests.Session:
+    """Сессия с cookie авторизации: замер не включает хеширование пароля на каждом запросе"""
+
+    session = requests.Session()
+    response = session.post(f"{base_url}/core/login", json={'username': username, 'password': password})
+    response.raise_for_status()
+    return session
+
+
+def run_client(base_url: str, session: requests.Session, path: str, deadline: float,
+               latencies: list, errors: list, lock: threading.Lock) -> None:
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            ok = session.get(base_url + path, timeout=30).status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.monotonic() - start
+        with lock:
+            (latencies if ok else errors).append(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='адрес API')
+    parser.add_argument('--path', default='/goals/goal/list?limit=20', help='замеряемый путь')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', type=int, default=8, help='одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=15, help='длительность замера, секунд')
+    args = parser.parse_args()
+
+    sessions: list = [login(args.url, args.user, args.password) for _ in range(args.concurrency)]
+    latencies: list = []
+    errors: list = []
+    lock = threading.Lock()
+    deadline: float = time.monotonic() + args.duration
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        for session in sessions:
+            executor.submit(run_client, args.url, session, args.path, deadline, latencies, errors, lock)
+
+    if not latencies:
+        raise SystemExit(f"Нет успешных ответов, ошибок: {len(errors)}")
+    latencies.sort()
+    print(f"запросов/с: {len(latencies) / args.duration:.1f}")
+    print(f"p50: {statistics.median(latencies) * 1000:.1f} мс, "
+          f"p95: {latencies[int(len(latencies) * 0.95)] * 1000:.1f} мс")
+    print(f"ошибок: {len(errors)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Сравнение разбора ответа getUpdates: dataclasses_json против tgbot.tg.dc.
+
+Запуск из корня проекта:
+
+    python benchmarks/tg_decode.py --updates 100 --repeat 200
+"""
+import argparse
+import sys
+import timeit
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+from dataclasses_json import config, dataclass_json
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tgbot.tg.dc import GetUpdatesResponse  # noqa: E402
+
+
+@dataclass_json
+@dataclass
+class LegacyChat:
+    id: int
+    type: str
+    first_name: Optional[str] = None
+    username: Optional[str] = None
+    last_name: Optional[str] = None
+    title: Optional[str] = None
+
+
+@dataclass_json
+@dataclass
+class LegacyMessageFrom:
+    id: int
+    is_bot: bool
+    first_name: str
+    username: Optional[str] = None
+    last_name: Optional[str] = None
+    language_code: Optional[str] = None
+
+
+@dataclass_json
+@dataclass
+class LegacyEntity:
+    offset: int
+    length: int
+    type: str
+
+
+@dataclass_json
+@dataclass
+class LegacyMessage:
+    message_id: int
+    date: int
+    chat: LegacyChat
+    from_: Optional[LegacyMessageFrom] = field(
+        default=None, metadata=config(field_name="from", letter_case=lambda x: "from"))
+    text: Optional[str] = None
+    entities: Optional[List[LegacyEntity]] = None
+
+
+@dataclass_json
+@dataclass
+class LegacyUpdateObj:
+    update_id: int
+    message: Optional[LegacyMessage] = None
+    edited_message: Optional[LegacyMessage] = None
+    channel_post: Optional[LegacyMessage] = None
+    edited_channel_post: Optional[LegacyMessage] = None
+
+
+@dataclass_json
+@dataclass
+class LegacyGetUpdatesResponse:
+    ok: bool
+    result: List[LegacyUpdateObj]
+
+
+def make_payload(updates: int) -> dict:
+    """Ответ getUpdates с типичными для лички сообщениями, включая неиспользуемые ботом поля"""
+
+    result: list = []
+    for i in range(updates):
+        result.append({'update_id': i, 'message': {
+            'message_id': i, 'date': 1700000000 + i, 'text': '/goals' if i % 3 else f"Цель номер {i}",
+            'chat': {'id': 1000 + i % 50, 'type': 'private', 'first_name': 'Иван', 'username': f'user{i % 50}'},
+            'from': {'id': 1000 + i % 50, 'is_bot': False, 'first_name': 'Иван', 'username': f'user{i % 50}',
+                     'language_code': 'ru', 'is_premium': True},
+            'entities': [{'offset': 0, 'length': 6, 'type': 'bot_command'}] if i % 3 else None,
+            'reply_to_message': {'message_id': i - 1, 'date': 1700000000, 'chat': {'id': 1, 'type': 'private'}},
+        }})
+    return {'ok': True, 'result': result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=100, help='обновлений в одном ответе getUpdates')
+    parser.add_argument('--repeat', type=int, default=200, help='число разборов ответа')
+    args = parser.parse_args()
+
+    payload: dict = make_payload(args.updates)
+    assert LegacyGetUpdatesResponse.from_dict(payload).result[-1].message.from_.username == \
+        GetUpdatesResponse.from_dict(payload).result[-1].message.from_.username
+
+    results: dict = {}
+    for name, decoder in (('dataclasses_json', LegacyGetUpdatesResponse.from_dict),
+                          ('tgbot.tg.dc', GetUpdatesResponse.from_dict)):
+        seconds: float = min(timeit.repeat(lambda: decoder(payload), number=args.repeat, repeat=3))
+        results[name] = seconds / (args.repeat * args.updates) * 1e6
+        print(f"{name:>16}: {results[name]:8.2f} мкс на обновление")
+    print(f"{'ускорение':>16}: {results['dataclasses_json'] / results['tgbot.tg.dc']:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
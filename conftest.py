@@ -0,0 +1,9 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """Очищает кеш, чтобы закешированные пользователи и страницы не переходили между тестами"""
+
+    cache.clear()
@@ -0,0 +1,37 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from core.models import User
+from core.user_cache import get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация, которая берёт пользователя из кеша, а не из БД на каждом запросе.
+
+    Проверки совпадают с JWTAuthentication: активность и отзыв токена при смене пароля
+    (хеш пароля в кешированном пользователе обновляется, так как кеш сбрасывается при сохранении).
+    Поэтому пользователь берётся из кеша, только если кеш общий для воркеров, иначе из БД.
+    """
+
+    def get_user(self, validated_token: Token) -> User:
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user: User | None = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
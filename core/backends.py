@@ -0,0 +1,11 @@
+from django.contrib.auth.backends import ModelBackend
+from core.models import User
+from core.user_cache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кеша core.user_cache, а не из БД на каждом запросе"""
+
+    def get_user(self, user_id: int) -> User | None:
+        user: User | None = get_cached_user(user_id)
+        return user if self.user_can_authenticate(user) else None
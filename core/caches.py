@@ -0,0 +1,13 @@
+from django.conf import settings
+
+# бэкенды, у которых свой кеш в каждом процессе
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared_cache(alias: str = 'default') -> bool:
+    """Общий ли кеш для процессов: запись и сброс в одном воркере видят остальные воркеры и бот"""
+
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_CACHE_BACKENDS
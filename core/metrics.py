@@ -0,0 +1,249 @@
+import atexit
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from django.conf import settings
+
+# секунды: от быстрых ответов из кеша до долгих запросов к Telegram
+DURATION_BUCKETS: tuple = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# число SQL-запросов на HTTP-запрос
+COUNT_BUCKETS: tuple = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Metric:
+    """Метрика с именованными метками; значения хранятся по кортежу значений меток"""
+
+    kind: str = ''
+
+    def __init__(self, registry: 'Registry', name: str, documentation: str, labels: tuple = ()) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def describe(self) -> dict:
+        return {'kind': self.kind, 'help': self.documentation, 'labels': list(self.labels)}
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик, значения процессов суммируются"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key: tuple = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.touch()
+
+
+class Gauge(Metric):
+    """Текущее значение; суммируется только по живым процессам"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key: tuple = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+        self.registry.touch()
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам с границами buckets, плюс сумма и количество"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry: 'Registry', name: str, documentation: str, labels: tuple = (),
+                 buckets: tuple = DURATION_BUCKETS) -> None:
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels) -> None:
+        key: tuple = self._key(labels)
+        index: int = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            entry: list = self.values.get(key) or self.values.setdefault(key, [[0] * (len(self.buckets) + 1), 0, 0])
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+        self.registry.touch()
+
+    def describe(self) -> dict:
+        return {**super().describe(), 'buckets': list(self.buckets)}
+
+
+class Registry:
+    """Реестр метрик процесса с выводом в текстовом формате Prometheus.
+
+    Без METRICS_DIR метрики видны только в своём процессе. С METRICS_DIR каждый
+    процесс (воркеры gunicorn, runbot, runoutbox) раз в METRICS_FLUSH_INTERVAL секунд
+    записывает свои значения в отдельный файл каталога, а collect складывает файлы
+    всех процессов: счётчики и гистограммы — целиком, включая завершившиеся процессы,
+    датчики — только из файлов, обновлявшихся в последние три интервала.
+    """
+
+    def __init__(self, directory: str | None = None, flush_interval: float | None = None) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.lock = threading.Lock()
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._flusher_pid: int | None = None
+        os.register_at_fork(after_in_child=self._reset)
+
+    @property
+    def directory(self) -> str:
+        return settings.METRICS_DIR if self._directory is None else self._directory
+
+    @property
+    def flush_interval(self) -> float:
+        return settings.METRICS_FLUSH_INTERVAL if self._flush_interval is None else self._flush_interval
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (),
+                  buckets: tuple = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labels, buckets=buckets)
+
+    def _register(self, cls: type, name: str, *args, **kwargs):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(self, name, *args, **kwargs)
+            return self.metrics[name]
+
+    def _reset(self) -> None:
+        """Дочерний процесс после fork начинает с нуля, иначе значения родителя посчитаются дважды"""
+
+        self.lock = threading.Lock()
+        self._flusher_pid = None
+        for metric in self.metrics.values():
+            metric.values = {}
+
+    def touch(self) -> None:
+        """Запускает фоновую запись в файл при первом изменении метрик в процессе"""
+
+        if self._flusher_pid == os.getpid() or not self.directory:
+            return
+        with self.lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_forever(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def snapshot(self) -> dict:
+        """Описания и значения всех метрик процесса в виде, пригодном для JSON"""
+
+        with self.lock:
+            return {
+                name: {**metric.describe(),
+                       'values': [[list(key), _copy_value(value)] for key, value in metric.values.items()]}
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self) -> None:
+        """Записывает значения процесса в его файл; запись атомарна, читатель не увидит половину файла"""
+
+        if not self.directory:
+            return
+        directory = Path(self.directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path: Path = directory / f"{socket.gethostname()}-{os.getpid()}.json"
+        temporary: Path = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def collect(self) -> dict:
+        """Значения всех процессов, сложенные по метрикам и меткам"""
+
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        fresh_after: float = time.time() - 3 * self.flush_interval
+        merged: dict = {}
+        for path in Path(self.directory).glob('*.json'):
+            try:
+                snapshot: dict = json.loads(path.read_text())
+                is_fresh: bool = path.stat().st_mtime >= fresh_after
+            except (OSError, ValueError):
+                continue
+            for name, metric in snapshot.items():
+                if metric['kind'] == 'gauge' and not is_fresh:
+                    continue
+                target: dict = merged.setdefault(name, {**metric, 'values': {}})
+                for key, value in metric['values']:
+                    _merge_value(target['values'], tuple(key), value)
+        for metric in merged.values():
+            metric['values'] = [[list(key), value] for key, value in metric['values'].items()]
+        return merged
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus 0.0.4"""
+
+        lines: list = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            for key, value in sorted(metric['values']):
+                labels: list = list(zip(metric['labels'], key))
+                if metric['kind'] != 'histogram':
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket in zip([*metric['buckets'], '+Inf'], counts):
+                    cumulative += bucket
+                    lines.append(f"{name}_bucket{_labels([*labels, ('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _copy_value(value):
+    """Копия значения: корзины гистограммы изменяются на месте"""
+
+    return [list(value[0]), value[1], value[2]] if isinstance(value, list) else value
+
+
+def _merge_value(values: dict, key: tuple, value) -> None:
+    if key not in values:
+        values[key] = _copy_value(value)
+    elif isinstance(value, list):
+        counts, total, count = values[key]
+        values[key] = [[a + b for a, b in zip(counts, value[0])], total + value[1], count + value[2]]
+    else:
+        values[key] += value
+
+
+def _number(value) -> str:
+    return value if isinstance(value, str) else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: list) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels) + '}'
+
+
+registry = Registry()
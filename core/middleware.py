@@ -0,0 +1,264 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, asynccontextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from rest_framework.serializers import BaseSerializer
+from .metrics import COUNT_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger(f"{__name__}.slow")
+
+_current_profile: ContextVar['RequestProfile | None'] = ContextVar('request_profile', default=None)
+
+REQUESTS = registry.counter(
+    'http_requests_total', 'HTTP-запросы по маршруту, методу и статусу ответа', ('view', 'method', 'status'))
+REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Время ответа по маршруту', ('view',))
+REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries', 'Число SQL-запросов на HTTP-запрос', ('view',), buckets=COUNT_BUCKETS)
+REQUEST_DB_DURATION = registry.histogram(
+    'http_request_db_duration_seconds', 'Время SQL-запросов за HTTP-запрос', ('view',))
+
+
+class QueryStats:
+    """Число и суммарное время SQL-запросов"""
+
+    def __init__(self) -> None:
+        self.query_count = 0
+        self.db_time = 0.0
+
+    def record_query(self, execute, sql: str, params, many: bool, context: dict):
+        """Обёртка execute_wrapper: считает запрос и его время"""
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add(sql, time.perf_counter() - start)
+
+    def add(self, sql: str, elapsed: float) -> None:
+        self.query_count += 1
+        self.db_time += elapsed
+
+    def capture(self) -> ExitStack:
+        """Контекст, в котором учитываются запросы ко всем базам"""
+
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self.record_query))
+        return stack
+
+    @asynccontextmanager
+    async def acapture(self):
+        """capture для async-middleware.
+
+        Соединения с БД у каждого потока свои, а запросы async ORM и синхронных представлений
+        выполняются в потоке sync_to_async, общем для всего HTTP-запроса, — обёртки ставятся там.
+        """
+
+        stack: ExitStack = await sync_to_async(self.capture)()
+        try:
+            yield
+        finally:
+            await sync_to_async(stack.close)()
+
+
+class RequestProfile(QueryStats):
+    """Замеры одного запроса: SQL-запросы с их временем, время сериализации и представления"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = time.perf_counter()
+        self.view_started: float | None = None
+        self.view_finished: float | None = None
+        self.serializer_time = 0.0
+        self.in_serializer = False
+        self.statements: Counter = Counter()
+        self.statement_time: Counter = Counter()
+
+    def add(self, sql: str, elapsed: float) -> None:
+        """SQL группируется без параметров, поэтому одинаковые запросы с разными id складываются"""
+
+        super().add(sql, elapsed)
+        self.statements[sql] += 1
+        self.statement_time[sql] += elapsed
+
+    def duplicates(self, limit: int) -> list[dict]:
+        """Самые частые повторяющиеся запросы — так выглядит N+1"""
+
+        return [
+            {'sql': sql, 'count': count, 'ms': round(self.statement_time[sql] * 1000, 2)}
+            for sql, count in self.statements.most_common(limit) if count > 1
+        ]
+
+    def timings(self, finished: float) -> dict:
+        """Длительности в миллисекундах: всего, представление, БД, сериализация и отрисовка ответа"""
+
+        view_started: float = self.view_started or self.started
+        view_finished: float = self.view_finished or finished
+        return {
+            'total': (finished - self.started) * 1000,
+            'view': (view_finished - view_started) * 1000,
+            'db': self.db_time * 1000,
+            'serializer': self.serializer_time * 1000,
+            'render': (finished - view_finished) * 1000,
+        }
+
+
+def _install_serializer_timer() -> None:
+    """Оборачивает BaseSerializer.data, чтобы учитывать время сериализации в профиле текущего запроса.
+
+    Вложенные сериализаторы вызывают to_representation, а не data, поэтому время не
+    удваивается; повторный вызов data внутри сериализации также не учитывается дважды.
+    """
+
+    original = BaseSerializer.data
+    if getattr(original.fget, 'profiled', False):
+        return
+
+    def data(serializer: BaseSerializer):
+        profile: RequestProfile | None = _current_profile.get()
+        if profile is None or profile.in_serializer:
+            return original.fget(serializer)
+        profile.in_serializer = True
+        start = time.perf_counter()
+        try:
+            return original.fget(serializer)
+        finally:
+            profile.serializer_time += time.perf_counter() - start
+            profile.in_serializer = False
+
+    data.profiled = True
+    BaseSerializer.data = property(data)
+
+
+class RequestProfilingMiddleware:
+    """Профилирование запросов, включается REQUEST_PROFILING.
+
+    Для каждого запроса считает SQL-запросы и их время, время представления, сериализации
+    и отрисовки ответа, отдаёт их в заголовке Server-Timing и пишет JSON-строкой в лог
+    core.middleware. Запросы дольше REQUEST_PROFILING_SLOW_MS дополнительно пишутся в лог
+    core.middleware.slow с самыми частыми повторяющимися SQL. Выключенный middleware
+    исключается Django при загрузке и ничего не стоит.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms: float = settings.REQUEST_PROFILING_SLOW_MS
+        self.top_sql: int = settings.REQUEST_PROFILING_TOP_SQL
+        self.is_async: bool = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        _install_serializer_timer()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self._acall(request)
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            with profile.capture():
+                request.profile = profile
+                response: HttpResponse = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self._report(request, response, profile)
+
+    async def _acall(self, request: HttpRequest) -> HttpResponse:
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            async with profile.acapture():
+                request.profile = profile
+                response: HttpResponse = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self._report(request, response, profile)
+
+    def _report(self, request: HttpRequest, response: HttpResponse, profile: RequestProfile) -> HttpResponse:
+        """Заголовок Server-Timing, строка лога и, для медленного запроса, строка лога медленных"""
+
+        timings: dict = profile.timings(time.perf_counter())
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings["db"]:.2f};desc="{profile.query_count} queries"',
+            *(f'{name};dur={timings[name]:.2f}' for name in ('view', 'serializer', 'render', 'total')),
+        ])
+
+        record: dict = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': profile.query_count,
+            **{f'{name}_ms': round(value, 2) for name, value in timings.items()},
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+        if timings['total'] >= self.slow_ms:
+            slow_logger.warning(json.dumps({**record, 'duplicates': profile.duplicates(self.top_sql)},
+                                           ensure_ascii=False))
+        return response
+
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs) -> None:
+        request.profile.view_started = time.perf_counter()
+
+    def process_template_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        # ответы DRF отрисовываются после этого хука: всё, что дальше, — время рендера JSON
+        request.profile.view_finished = time.perf_counter()
+        return response
+
+
+class MetricsMiddleware:
+    """Метрики HTTP-запросов для /metrics: число, время ответа, число и время SQL-запросов по маршрутам.
+
+    Маршрут — имя из urls.py, запросы мимо маршрутов собираются под именем unmatched.
+    Выключается METRICS_ENABLED=False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async: bool = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self._acall(request)
+        stats = QueryStats()
+        start = time.perf_counter()
+        with stats.capture():
+            response: HttpResponse = self.get_response(request)
+        self._record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def _acall(self, request: HttpRequest) -> HttpResponse:
+        stats = QueryStats()
+        start = time.perf_counter()
+        async with stats.acapture():
+            response: HttpResponse = await self.get_response(request)
+        self._record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def _record(request: HttpRequest, response: HttpResponse, stats: QueryStats, elapsed: float) -> None:
+        match = request.resolver_match
+        view: str = match.view_name if match and match.view_name else 'unmatched'
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(elapsed, view=view)
+        REQUEST_QUERIES.observe(stats.query_count, view=view)
+        REQUEST_DB_DURATION.observe(stats.db_time, view=view)
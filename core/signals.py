@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.models import User
+from core.user_cache import invalidate_cached_user
+
+
+@receiver([post_save, post_delete], sender=User)
+def reset_cached_user(sender, instance: User, **kwargs) -> None:
+    """Сбрасывает кеш пользователя после изменения профиля, пароля или удаления"""
+
+    invalidate_cached_user(instance.pk)
@@ -1,4 +1,13 @@
+import json
+import logging
+import os
 import pytest
+from django.contrib.sessions.models import Session
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .metrics import Registry
+from .middleware import RequestProfile, RequestProfilingMiddleware
 from .models import User
 from rest_framework.test import APIClient
 
@@ -21,6 +30,16 @@ def api_client() -> APIClient:
     return APIClient()
 
 
+@pytest.fixture
+def shared_cache(settings, tmp_path) -> None:
+    """Включает кеш пользователей и сессий на общем для процессов файловом кеше"""
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)}}
+    settings.USER_CACHE_TIMEOUT = 60
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 @pytest.mark.django_db
 def test_signup(api_client: APIClient) -> None:
     """Тестирует регистрацию нового пользователя"""
@@ -189,3 +208,189 @@ def test_signup_password_mismatch(api_client: APIClient) -> None:
     assert response.status_code == 400
     assert "password_repeat" in response.data or "non_field_errors" in response.data
     assert not User.objects.filter(username="user").exists()
+
+
+@pytest.mark.django_db
+def test_session_auth_uses_cached_user(shared_cache, api_client: APIClient, user: User) -> None:
+    """Тестирует сессию и пользователя из кеша без запросов к БД и сброс кеша при изменении профиля"""
+
+    api_client.post("/core/login", {"username": "testuser", "password": "password123"}, format="json")
+    assert api_client.get("/core/profile").status_code == 200
+    with CaptureQueriesContext(connection) as queries:
+        assert api_client.get("/core/profile").status_code == 200
+    assert len(queries) == 0
+
+    api_client.patch("/core/profile", {"first_name": "Новое"}, format="json")
+    assert api_client.get("/core/profile").data["first_name"] == "Новое"
+
+
+@pytest.mark.django_db
+def test_session_deleted_in_another_worker(api_client: APIClient, user: User) -> None:
+    """Тестирует, что без общего кеша удалённая сессия перестаёт действовать сразу, а не по истечении в кеше"""
+
+    api_client.post("/core/login", {"username": "testuser", "password": "password123"}, format="json")
+    assert api_client.get("/core/profile").status_code == 200
+
+    # удаление в БД без сброса кеша этого процесса, как выход в другом воркере
+    Session.objects.all().delete()
+    assert api_client.get("/core/profile").status_code in (401, 403)
+
+
+@pytest.mark.django_db
+def test_jwt_auth_without_queries(shared_cache, api_client: APIClient, user: User) -> None:
+    """Тестирует выдачу и обновление JWT и повторные запросы по токену без обращения к БД"""
+
+    response = api_client.post(
+        "/core/token", {"username": "testuser", "password": "password123"}, format="json")
+    assert response.status_code == 200
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    assert api_client.get("/core/profile").status_code == 200
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get("/core/profile")
+    assert response.data["username"] == "testuser"
+    assert len(queries) == 0
+
+    refreshed = api_client.post("/core/token/refresh", {"refresh": "bad"}, format="json")
+    assert refreshed.status_code == 401
+
+
+@pytest.mark.django_db
+def test_jwt_revoked_after_password_change(api_client: APIClient, user: User) -> None:
+    """Тестирует, что после смены пароля старый токен перестаёт приниматься"""
+
+    tokens = api_client.post(
+        "/core/token", {"username": "testuser", "password": "password123"}, format="json").data
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    response = api_client.put(
+        "/core/update_password",
+        {"old_password": "password123", "new_password": "newpassword123"},
+        format="json"
+    )
+    assert response.status_code == 200
+
+    assert api_client.get("/core/profile").status_code == 401
+    refreshed = api_client.post("/core/token/refresh", {"refresh": tokens['refresh']}, format="json")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data.get('access')}")
+    assert api_client.get("/core/profile").status_code == 401
+
+
+@pytest.mark.django_db
+def test_user_cache_off_by_default(api_client: APIClient, user: User) -> None:
+    """Тестирует, что без общего кеша пользователь читается из БД: отключение в другом воркере действует сразу"""
+
+    access = api_client.post("/core/token", {"username": "testuser", "password": "password123"}, format="json")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access.data['access']}")
+    assert api_client.get("/core/profile").status_code == 200
+
+    # update() не отправляет сигналов, как и сохранение в другом процессе для кеша этого
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    assert api_client.get("/core/profile").status_code == 401
+
+
+@pytest.mark.django_db
+def test_jwt_revoked_without_shared_cache(settings, api_client: APIClient, user: User) -> None:
+    """Тестирует, что с кешем своего процесса смена пароля в другом воркере сразу отзывает токен"""
+
+    settings.USER_CACHE_TIMEOUT = 60
+    access = api_client.post("/core/token", {"username": "testuser", "password": "password123"}, format="json")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access.data['access']}")
+    assert api_client.get("/core/profile").status_code == 200
+
+    user.set_password("newpassword123")
+    # update() не отправляет сигналов, как и сохранение в другом процессе для кеша этого
+    User.objects.filter(pk=user.pk).update(password=user.password)
+    assert api_client.get("/core/profile").status_code == 401
+
+
+@pytest.mark.django_db
+def test_request_profiling(settings, caplog, user: User) -> None:
+    """Тестирует заголовок Server-Timing, JSON-строку лога и лог медленных запросов с повторяющимися SQL"""
+
+    settings.REQUEST_PROFILING = True
+    settings.REQUEST_PROFILING_SLOW_MS = 0
+    client = APIClient()
+    client.force_authenticate(user)
+    board = client.post("/goals/board/create", {"title": "Доска"}, format="json").data
+    for i in range(3):
+        client.post("/goals/goal_category/create", {"title": f"Категория {i}", "board": board["id"]}, format="json")
+    caplog.clear()
+
+    with caplog.at_level(logging.INFO, logger="core.middleware"):
+        response = client.get("/goals/goal_category/list")
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert "db;dur=" in timing and "serializer;dur=" in timing and "total;dur=" in timing
+
+    record = json.loads(next(r.message for r in caplog.records if r.name == "core.middleware"))
+    assert record["path"] == "/goals/goal_category/list"
+    assert record["status"] == 200 and record["queries"] > 0
+    assert record["serializer_ms"] > 0
+    slow = json.loads(next(r.message for r in caplog.records if r.name == "core.middleware.slow"))
+    assert slow["queries"] == record["queries"]
+    assert isinstance(slow["duplicates"], list)
+
+
+def test_request_profiling_disabled(settings) -> None:
+    """Тестирует, что выключенное профилирование исключает middleware из цепочки"""
+
+    settings.REQUEST_PROFILING = False
+    with pytest.raises(MiddlewareNotUsed):
+        RequestProfilingMiddleware(lambda request: None)
+
+
+def test_request_profile_duplicates() -> None:
+    """Тестирует группировку повторяющихся SQL без учёта параметров"""
+
+    profile = RequestProfile()
+    for sql, params in [("SELECT 1 WHERE id = %s", [1]), ("SELECT 1 WHERE id = %s", [2]), ("SELECT 2", [])]:
+        profile.record_query(lambda *args: None, sql, params, False, {})
+    assert profile.query_count == 3
+    assert [d["sql"] for d in profile.duplicates(5)] == ["SELECT 1 WHERE id = %s"]
+    assert profile.duplicates(5)[0]["count"] == 2
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(settings, api_client: APIClient, user: User) -> None:
+    """Тестирует метрики запросов по маршрутам и защиту /metrics токеном, без которого он отключён"""
+
+    api_client.force_authenticate(user)
+    api_client.get("/core/profile")
+    api_client.get("/core/profile")
+
+    settings.METRICS_TOKEN = ""
+    assert api_client.get("/metrics").status_code == 404
+
+    settings.METRICS_TOKEN = "token"
+    assert api_client.get("/metrics").status_code == 403
+    assert api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 403
+    text = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer token").content.decode()
+    assert 'http_requests_total{view="profile",method="GET",status="200"}' in text
+    assert 'http_request_duration_seconds_count{view="profile"}' in text
+    assert 'http_request_db_queries_bucket{view="profile",le="+Inf"}' in text
+
+
+def test_metrics_aggregate_processes(tmp_path) -> None:
+    """Тестирует сложение метрик процессов через общий каталог и отбрасывание датчиков остановленных процессов"""
+
+    def fill(metrics: Registry, amount: int, value: float) -> None:
+        metrics.counter("test_requests_total", "Запросы", ("view",)).inc(amount, view="list")
+        metrics.histogram("test_latency_seconds", "Время", buckets=(0.1, 1)).observe(value)
+        metrics.gauge("test_backlog", "Очередь").set(amount)
+
+    other = Registry(directory="")
+    fill(other, 2, 0.5)
+    (tmp_path / "worker-2.json").write_text(json.dumps(other.snapshot()))
+    metrics = Registry(directory=str(tmp_path), flush_interval=60)
+    fill(metrics, 1, 0.05)
+
+    text = metrics.render()
+    assert 'test_requests_total{view="list"} 3.0' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'test_latency_seconds_count 2' in text
+    assert 'test_backlog 3.0' in text
+
+    os.utime(tmp_path / "worker-2.json", (0, 0))
+    assert 'test_backlog 1.0' in metrics.render()
+    assert len(list(tmp_path.glob("*.json"))) == 2
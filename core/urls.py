@@ -1,4 +1,5 @@
 from django.urls import path
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from . import views
 
 urlpatterns = [
@@ -6,5 +7,7 @@ urlpatterns = [
     path('signup', views.SignupView.as_view(), name='signup'),
     path('profile', views.ProfileView.as_view(), name='profile'),
     path('update_password', views.UpdatePasswordView.as_view(), name='update_password'),
+    path('token', TokenObtainPairView.as_view(), name='token_obtain'),
+    path('token/refresh', TokenRefreshView.as_view(), name='token_refresh'),
 
 ]
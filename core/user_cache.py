@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.cache import cache
+from core.caches import is_shared_cache
+from core.models import User
+
+
+def _user_key(user_id: int) -> str:
+    return f"core:user:{user_id}"
+
+
+def get_cached_user(user_id: int) -> User | None:
+    """Пользователь по id: из кеша на USER_CACHE_TIMEOUT секунд, при промахе — одним запросом к БД.
+
+    Кеш своего процесса не используется: сброс после смены пароля или отключения
+    пользователя в другом воркере до него не дойдёт.
+    """
+
+    if not settings.USER_CACHE_TIMEOUT or not is_shared_cache():
+        return User.objects.filter(pk=user_id).first()
+
+    key: str = _user_key(user_id)
+    user: User | None = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    cache.delete(_user_key(user_id))
@@ -1,9 +1,14 @@
+import hmac
 from rest_framework import permissions, status
 from rest_framework.generics import RetrieveUpdateDestroyAPIView, CreateAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.request import Request
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseForbidden
+from django.views import View
+from .metrics import registry
 from .models import User
 from .serializers import (SignupSerializer,
                           ProfileSerializer,
@@ -61,3 +66,15 @@ class UpdatePasswordView(APIView):
         return Response({
             'message': 'Пароль успешно изменен'
         }, status=status.HTTP_200_OK)
+
+
+class MetricsView(View):
+    """Метрики всех процессов в текстовом формате Prometheus по Bearer-токену METRICS_TOKEN; без токена отключены"""
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        token: str = settings.METRICS_TOKEN
+        if not token:
+            raise Http404()
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return HttpResponseForbidden()
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
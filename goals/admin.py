@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from goals.models import GoalCategory, Goal, GoalComment, Board, BoardParticipant
+from goals.models import ArchiveJob, GoalCategory, Goal, GoalComment, Board, BoardParticipant
 
 
 @admin.register(Board)
@@ -68,3 +68,11 @@ class GoalCommentAdmin(admin.ModelAdmin):
         return obj.text[:50] + "..." if len(obj.text) > 50 else obj.text
 
     short_text.short_description = 'Текст'
+
+
+@admin.register(ArchiveJob)
+class ArchiveJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'board', 'category', 'user', 'status', 'archived', 'created', 'finished')
+    list_filter = ('status', 'created')
+    readonly_fields = ('created', 'updated', 'finished', 'archived', 'last_error')
+    list_per_page = 20
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BoardsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "goals"
+
+    def ready(self) -> None:
+        from goals import signals  # noqa: F401
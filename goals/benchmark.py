@@ -0,0 +1,216 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from core.models import User
+from goals.models import ArchiveJob, Board, BoardParticipant, GoalCategory, GoalComment
+from goals.synthetic import SYNTHETIC_PASSWORD, SyntheticConfig, SyntheticData, generate
+
+# отдельный кеш, чтобы ответы по данным замера не попали в рабочий кеш
+BENCHMARK_CACHES: dict = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}}
+
+
+@dataclass(slots=True)
+class Route:
+    """Замеряемый запрос: маршрут по имени из urls.py и предельное число SQL-запросов.
+
+    build(data, i) готовит i-й запрос и возвращает словарь с необязательными ключами
+    args (аргументы маршрута), data (тело) и user (от чьего имени, по умолчанию владелец досок).
+    """
+
+    label: str
+    name: str
+    method: str
+    budget: int
+    build: Callable[[SyntheticData, int], dict] = lambda data, i: {}
+    query: str = ''
+    auth: bool = True
+
+
+def _owner(data: SyntheticData) -> User:
+    return data.users[0]
+
+
+def _new_board(data: SyntheticData, i: int) -> dict:
+    board: Board = Board.objects.create(title=f"Удаляемая доска {i}")
+    BoardParticipant.objects.create(board=board, user=_owner(data), role=BoardParticipant.Role.owner)
+    return {'args': [board.id]}
+
+
+def _new_category(data: SyntheticData, i: int) -> dict:
+    category: GoalCategory = GoalCategory.objects.create(
+        title=f"Удаляемая категория {i}", board=data.boards[0], user=_owner(data))
+    return {'args': [category.id]}
+
+
+def _new_comment(data: SyntheticData, i: int) -> dict:
+    comment: GoalComment = GoalComment.objects.create(
+        text=f"Удаляемый комментарий {i}", goal_id=data.goal_ids[0], user=_owner(data))
+    return {'args': [comment.id]}
+
+
+def _board_update(data: SyntheticData, i: int) -> dict:
+    """Переименование доски с прежним составом участников"""
+
+    board: Board = data.boards[0]
+    participants: list = [
+        {'user': username, 'role': role}
+        for username, role in board.participants.exclude(role=BoardParticipant.Role.owner)
+        .values_list('user__username', 'role')]
+    return {'args': [board.id], 'data': {'title': f"Доска {i}", 'participants': participants}}
+
+
+def _archive_job(data: SyntheticData, i: int) -> dict:
+    job: ArchiveJob = ArchiveJob.objects.create(user=_owner(data), board=data.boards[-1])
+    return {'args': [job.id]}
+
+
+def _password_user(data: SyntheticData, i: int) -> dict:
+    """Смена пароля туда и обратно у отдельного пользователя, чтобы токен владельца оставался действительным"""
+
+    user, _ = User.objects.get_or_create(
+        username='benchmark_password', defaults={'email': 'benchmark_password@example.com'})
+    old, new = (SYNTHETIC_PASSWORD, f"{SYNTHETIC_PASSWORD}-new") if i % 2 == 0 else \
+        (f"{SYNTHETIC_PASSWORD}-new", SYNTHETIC_PASSWORD)
+    if i == 0:
+        user.set_password(old)
+        user.save()
+    return {'user': user, 'data': {'old_password': old, 'new_password': new}}
+
+
+def _credentials(data: SyntheticData, i: int) -> dict:
+    return {'data': {'username': _owner(data).username, 'password': SYNTHETIC_PASSWORD}}
+
+
+def _goal(data: SyntheticData, i: int) -> int:
+    return data.goal_ids[i % len(data.goal_ids)]
+
+
+ROUTES: list[Route] = [
+    Route('category create', 'goal_category_create', 'post', 5,
+          lambda data, i: {'data': {'title': f"Новая категория {i}", 'board': data.boards[0].id}}),
+    Route('category list', 'goal_category_list', 'get', 5, query='?limit=20'),
+    Route('category detail', 'goal_category_detail', 'get', 3,
+          lambda data, i: {'args': [data.category_ids[i % len(data.category_ids)]]}),
+    Route('category update', 'goal_category_detail', 'patch', 6,
+          lambda data, i: {'args': [data.category_ids[0]], 'data': {'title': f"Категория {i}"}}),
+    Route('category delete', 'goal_category_detail', 'delete', 9, _new_category),
+
+    Route('goal create', 'goal_create', 'post', 7,
+          lambda data, i: {'data': {'title': f"Новая цель {i}", 'category': data.category_ids[0]}}),
+    Route('goal list', 'goal_list', 'get', 6, query='?limit=20'),
+    Route('goal list cursor', 'goal_list', 'get', 5, query='?cursor=&limit=20'),
+    Route('goal list comments count', 'goal_list', 'get', 5, query='?limit=20&comments=count'),
+    Route('goal list search', 'goal_list', 'get', 6, query='?limit=20&search=цель'),
+    Route('goal bulk', 'goal_bulk', 'post', 7, lambda data, i: {'data': {'operations': [
+        {'action': 'update', 'id': goal_id, 'data': {'priority': 1 + i % 4}} for goal_id in data.goal_ids[:10]]}}),
+    Route('goal detail', 'goal_detail', 'get', 4, lambda data, i: {'args': [_goal(data, i)]}),
+    Route('goal update', 'goal_detail', 'patch', 7,
+          lambda data, i: {'args': [_goal(data, i)], 'data': {'title': f"Цель {i}"}}),
+    Route('goal delete', 'goal_detail', 'delete', 6, lambda data, i: {'args': [_goal(data, i)]}),
+
+    Route('comment create', 'goal_comment_create', 'post', 4,
+          lambda data, i: {'data': {'text': f"Комментарий {i}", 'goal': data.goal_ids[0]}}),
+    Route('comment list', 'goal_comment_list', 'get', 4, query='?limit=20'),
+    Route('comment detail', 'goal_comment_detail', 'get', 3,
+          lambda data, i: {'args': [data.comment_ids[i % len(data.comment_ids)]]}),
+    Route('comment update', 'goal_comment_detail', 'patch', 6,
+          lambda data, i: {'args': [data.comment_ids[0]], 'data': {'text': f"Комментарий {i}"}}),
+    Route('comment delete', 'goal_comment_detail', 'delete', 5, _new_comment),
+
+    Route('board create', 'board_create', 'post', 4, lambda data, i: {'data': {'title': f"Новая доска {i}"}}),
+    Route('board list', 'board_list', 'get', 5, query='?limit=20'),
+    Route('board detail', 'board_detail', 'get', 4,
+          lambda data, i: {'args': [data.boards[i % len(data.boards)].id]}),
+    Route('board update', 'board_detail', 'put', 10, _board_update),
+    Route('board delete', 'board_detail', 'delete', 9, _new_board),
+    Route('archive job detail', 'archive_job_detail', 'get', 2, _archive_job),
+
+    Route('login', 'login', 'post', 9, _credentials, auth=False),
+    Route('signup', 'signup', 'post', 3, lambda data, i: {'data': {
+        'username': f"benchmark_signup_{i}", 'email': f"benchmark_signup_{i}@example.com",
+        'password': 'Sign-up-pass-42', 'password_repeat': 'Sign-up-pass-42'}}, auth=False),
+    Route('profile', 'profile', 'get', 1),
+    Route('profile update', 'profile', 'patch', 2, lambda data, i: {'data': {'first_name': f"Имя {i}"}}),
+    Route('update password', 'update_password', 'put', 9, _password_user),
+    Route('token', 'token_obtain', 'post', 1, _credentials, auth=False),
+    Route('token refresh', 'token_refresh', 'post', 1,
+          lambda data, i: {'data': {'refresh': str(RefreshToken.for_user(_owner(data)))}}, auth=False),
+]
+
+
+def _percentile(values: list, share: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def measure(route: Route, data: SyntheticData, repeat: int) -> dict:
+    """Выполняет запрос repeat раз и возвращает задержки в миллисекундах и число SQL-запросов"""
+
+    # первый запрос каждого маршрута одинаково холодный: без закешированных пользователей и ролей
+    cache.clear()
+    latencies: list = []
+    queries: list = []
+    statuses: set = set()
+    for i in range(repeat):
+        spec: dict = route.build(data, i)
+        client = APIClient()
+        if route.auth:
+            user: User = User.objects.get(pk=spec.get('user', _owner(data)).pk)
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        path: str = reverse(route.name, args=spec.get('args', [])) + route.query
+
+        with CaptureQueriesContext(connection) as context:
+            start: float = time.perf_counter()
+            response = getattr(client, route.method)(path, spec.get('data'), format='json')
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context.captured_queries))
+        statuses.add(response.status_code)
+
+    latencies.sort()
+    return {
+        'label': route.label,
+        'route': route.name,
+        'method': route.method.upper(),
+        'budget': route.budget,
+        'queries': max(queries),
+        'queries_first': queries[0],
+        'over_budget': max(queries) > route.budget,
+        'statuses': sorted(statuses),
+        'failed': any(code >= 400 for code in statuses),
+        'p50_ms': round(_percentile(latencies, 0.5), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'p99_ms': round(_percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2),
+    }
+
+
+def run_benchmark(config: SyntheticConfig, repeat: int = 20, routes: list[Route] | None = None) -> dict:
+    """Создаёт синтетические данные, замеряет маршруты и откатывает все изменения.
+
+    Данные живут в транзакции, которая откатывается в конце, поэтому замер можно
+    запускать на любой базе. Задержки включают накладные расходы на подсчёт запросов.
+    """
+
+    # без кеша данных списков каждый повтор замеряет выборку и сериализацию, а не чтение из кеша
+    test_settings = override_settings(CACHES=BENCHMARK_CACHES, LIST_CACHE_TIMEOUT=0,
+                                      ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+    with test_settings, transaction.atomic():
+        data: SyntheticData = generate(config)
+        results: list = [measure(route, data, repeat) for route in routes or ROUTES]
+        transaction.set_rollback(True)
+
+    return {
+        'created': timezone.now().isoformat(),
+        'vendor': connection.vendor,
+        'repeat': repeat,
+        'config': asdict(config),
+        'routes': results,
+    }
@@ -0,0 +1,72 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from goals.models import Board, BoardParticipant
+
+
+def bump_board_versions(board_ids) -> None:
+    """Увеличивает версии досок (список id или подзапрос), чтобы сменились ETag зависящих от них списков"""
+
+    Board.objects.filter(id__in=board_ids).update(version=F('version') + 1)
+
+
+class ConditionalListMixin:
+    """Условный GET для списков: ETag из версий досок пользователя и кеш данных ответа.
+
+    Любая запись в доску увеличивает Board.version, а изменение членства меняет набор
+    досок, поэтому совпавший ETag означает неизменный ответ: 304 отдаётся без запроса
+    списка и сериализации, а новый ETag, уже встречавшийся другим клиентам того же
+    пользователя, берёт данные из кеша на LIST_CACHE_TIMEOUT секунд.
+    """
+
+    def _board_versions(self, request: Request):
+        return BoardParticipant.objects.filter(
+            user=request.user, board__is_deleted=False
+        ).order_by('board_id').values_list('board_id', 'board__version')
+
+    def _make_etag(self, request: Request, versions: list) -> str:
+        stamp: str = f"{request.user.pk}|{request.accepted_renderer.format}|{request.build_absolute_uri()}|{versions}"
+        return quote_etag(hashlib.sha1(stamp.encode()).hexdigest())
+
+    def get_list_etag(self, request: Request) -> str:
+        return self._make_etag(request, list(self._board_versions(request)))
+
+    async def aget_list_etag(self, request: Request) -> str:
+        return self._make_etag(request, [row async for row in self._board_versions(request)])
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        etag: str = self.get_list_etag(request)
+        headers: dict = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        timeout: int = settings.LIST_CACHE_TIMEOUT
+        key: str = f"goals:list:{etag}"
+        data = cache.get(key) if timeout else None
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            if timeout:
+                cache.set(key, data, timeout)
+        return Response(data, headers=headers)
+
+    async def alist(self, request: Request, *args, **kwargs) -> Response:
+        """list для async-представлений: версии досок, кеш и страница читаются без блокировки цикла событий"""
+
+        etag: str = await self.aget_list_etag(request)
+        headers: dict = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        timeout: int = settings.LIST_CACHE_TIMEOUT
+        key: str = f"goals:list:{etag}"
+        data = await cache.aget(key) if timeout else None
+        if data is None:
+            data = (await super().alist(request, *args, **kwargs)).data
+            if timeout:
+                await cache.aset(key, data, timeout)
+        return Response(data, headers=headers)
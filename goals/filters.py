@@ -1,7 +1,8 @@
 import django_filters
-from django.db import models
 from django.db.models import QuerySet
+from rest_framework import filters
 from goals.models import Goal, GoalComment, GoalCategory
+from goals.search import SEARCH_RANK, search_goals
 
 
 class GoalFilter(django_filters.FilterSet):
@@ -25,17 +26,14 @@ class GoalFilter(django_filters.FilterSet):
     )
 
     search = django_filters.CharFilter(method='filter_search')
-    board = django_filters.NumberFilter(field_name='category__board__id')
+    board = django_filters.NumberFilter(field_name='board_id')
 
     class Meta:
         model = Goal
         fields = ['category', 'priority', 'status', 'board']
 
     def filter_search(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
-        return queryset.filter(
-            models.Q(title__icontains=value) |
-            models.Q(description__icontains=value)
-        )
+        return search_goals(queryset, value)
 
 
 class GoalCommentFilter(django_filters.FilterSet):
@@ -52,3 +50,14 @@ class GoalCategoryFilter(django_filters.FilterSet):
     class Meta:
         model = GoalCategory
         fields = ['board']
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """Сортирует результаты полнотекстового поиска по релевантности, если порядок не задан явно"""
+
+    def get_ordering(self, request, queryset: QuerySet, view) -> list:
+        ordering: list = super().get_ordering(request, queryset, view)
+        params: str = request.query_params.get(self.ordering_param)
+        if not params and SEARCH_RANK in queryset.query.annotations:
+            return [f'-{SEARCH_RANK}', *ordering]
+        return ordering
@@ -0,0 +1,67 @@
+import inspect
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from rest_framework.generics import ListAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+from goals.membership import aget_board_roles
+
+
+class AsyncListAPIView(ListAPIView):
+    """ListAPIView, который Django вызывает как корутину (для ASGI-развёртывания).
+
+    Аутентификация, проверка прав, согласование формата и фильтры остаются синхронными
+    DRF и выполняются в потоке через sync_to_async. Роли в досках, подсчёт и выборка
+    страницы идут через async ORM, поэтому пока база отвечает, воркер обслуживает
+    другие запросы. Сериализатор получает уже загруженные объекты со всеми
+    select_related и prefetch_related и к БД не обращается.
+
+    Асинхронный вариант готового списка — наследник списка и этого класса:
+    class AsyncGoalListView(GoalListView, AsyncListAPIView). Тогда ConditionalListMixin
+    списка оборачивает alist так же, как list.
+    """
+
+    async def dispatch(self, request, *args, **kwargs) -> Response:
+        """Повторяет APIView.dispatch, дожидаясь асинхронного обработчика метода"""
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def get(self, request: Request, *args, **kwargs) -> Response:
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request: Request, *args, **kwargs) -> Response:
+        # роли запоминаются на пользователе, get_queryset берёт из них id досок без запроса
+        await aget_board_roles(request.user)
+        queryset: QuerySet = await sync_to_async(self.filter_queryset)(self.get_queryset())
+
+        page: list | None = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def apaginate_queryset(self, queryset: QuerySet) -> list | None:
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from core.models import User
+from goals.caching import bump_board_versions
+from goals.models import ArchiveJob, Board, Goal, GoalCategory, Status
+
+
+def enqueue_archive(user: User, board: Board, category: GoalCategory | None = None) -> ArchiveJob:
+    """Ставит в очередь архивирование целей доски или одной её категории"""
+
+    return ArchiveJob.objects.create(user=user, board=board, category=category)
+
+
+class ArchiveWorker:
+    """Выполняет задачи ArchiveJob порциями по batch_size целей.
+
+    Каждый шаг — отдельная короткая транзакция, поэтому архивирование большой
+    доски не держит блокировки. Задача берётся под аренду (lease_until сдвигается
+    на LEASE), и несколько воркеров не выполняют один шаг дважды. Упавший шаг
+    повторяется с экспоненциальной задержкой, после max_attempts задача помечается ошибочной.
+    """
+
+    LEASE = timedelta(seconds=60)
+
+    def __init__(self, batch_size: int = 1000, max_attempts: int = 5, backoff: float = 1.0) -> None:
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    def run_once(self) -> bool:
+        """Выполняет один шаг одной задачи; False, если готовых задач нет"""
+
+        job: ArchiveJob | None = self._claim()
+        if job is None:
+            return False
+        try:
+            with transaction.atomic():
+                self._step(job)
+        except Exception as e:
+            self._fail(job, e)
+        return True
+
+    def _claim(self) -> ArchiveJob | None:
+        now = timezone.now()
+        with transaction.atomic():
+            queryset = ArchiveJob.objects.filter(
+                status__in=[ArchiveJob.Status.pending, ArchiveJob.Status.running],
+                lease_until__lte=now).order_by('lease_until', 'id')
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            job: ArchiveJob | None = queryset.first()
+            if job is not None:
+                job.status = ArchiveJob.Status.running
+                job.lease_until = now + self.LEASE
+                job.save(update_fields=['status', 'lease_until', 'updated'])
+        return job
+
+    def _step(self, job: ArchiveJob) -> None:
+        """Архивирует очередную порцию целей; когда целей не осталось, завершает задачу"""
+
+        goals = Goal.objects.filter(board_id=job.board_id).exclude(status=Status.archived)
+        if job.category_id is not None:
+            goals = goals.filter(category_id=job.category_id)
+        ids: list = list(goals.values_list('id', flat=True)[:self.batch_size])
+        if ids:
+            job.archived += Goal.objects.filter(id__in=ids).update(status=Status.archived, updated=timezone.now())
+            # update() не отправляет сигналы, версия доски обновляется явно
+            bump_board_versions([job.board_id])
+
+        if len(ids) < self.batch_size:
+            job.status = ArchiveJob.Status.done
+            job.finished = timezone.now()
+        job.attempts = 0
+        job.lease_until = timezone.now()
+        job.save(update_fields=['archived', 'status', 'finished', 'attempts', 'lease_until', 'updated'])
+
+    def _fail(self, job: ArchiveJob, error: Exception) -> None:
+        job.attempts += 1
+        job.last_error = str(error)
+        if job.attempts >= self.max_attempts:
+            job.status = ArchiveJob.Status.failed
+            job.finished = timezone.now()
+        else:
+            job.lease_until = timezone.now() + timedelta(seconds=self.backoff * 2 ** (job.attempts - 1))
+        job.save(update_fields=['attempts', 'last_error', 'status', 'finished', 'lease_until', 'updated'])
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+# медленный клиент отправляет запрос и читает ответ порциями такого размера
+SLOW_CHUNK = 16
+
+
+@dataclass(slots=True)
+class LoadConfig:
+    """Нагрузка на работающий сервер: медленные клиенты занимают соединения, быстрые замеряют задержку.
+
+    Медленный клиент отправляет запрос по SLOW_CHUNK байт раз в slow_interval секунд
+    и так же читает ответ, как клиент на плохом мобильном канале; закончив, сразу
+    начинает следующий запрос. Быстрые клиенты без пауз повторяют тот же запрос.
+    """
+
+    url: str
+    token: str = ''
+    slow_clients: int = 50
+    fast_clients: int = 5
+    slow_interval: float = 0.2
+    duration: float = 10
+    timeout: float = 5
+
+
+def build_request(config: LoadConfig) -> bytes:
+    parts = urlsplit(config.url)
+    path: str = parts.path + (f"?{parts.query}" if parts.query else '')
+    lines: list = [f"GET {path or '/'} HTTP/1.1", f"Host: {parts.netloc}", "Accept: application/json",
+                   "Connection: close"]
+    if config.token:
+        lines.append(f"Authorization: Bearer {config.token}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+async def _open(config: LoadConfig) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    parts = urlsplit(config.url)
+    return await asyncio.wait_for(asyncio.open_connection(parts.hostname, parts.port or 80), config.timeout)
+
+
+async def _slow_client(config: LoadConfig, request: bytes, counters: dict) -> None:
+    while True:
+        writer: asyncio.StreamWriter | None = None
+        try:
+            reader, writer = await _open(config)
+            for start in range(0, len(request), SLOW_CHUNK):
+                writer.write(request[start:start + SLOW_CHUNK])
+                await writer.drain()
+                await asyncio.sleep(config.slow_interval)
+            while await reader.read(SLOW_CHUNK):
+                await asyncio.sleep(config.slow_interval)
+            counters['slow_completed'] += 1
+        except (OSError, asyncio.TimeoutError):
+            counters['slow_errors'] += 1
+            await asyncio.sleep(config.slow_interval)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+async def _exchange(config: LoadConfig, request: bytes) -> str:
+    reader, writer = await _open(config)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response: bytes = await reader.read()
+    finally:
+        writer.close()
+    return response.split(b' ', 2)[1].decode() if response.startswith(b'HTTP/') else 'closed'
+
+
+async def _fast_client(config: LoadConfig, request: bytes, latencies: list, statuses: dict, counters: dict) -> None:
+    while True:
+        start: float = time.perf_counter()
+        try:
+            status: str = await asyncio.wait_for(_exchange(config, request), config.timeout)
+        except asyncio.TimeoutError:
+            status = 'timeout'
+        except OSError:
+            status = 'error'
+        except asyncio.CancelledError:
+            # запрос, не получивший ответа к концу замера
+            counters['fast_unfinished'] += 1
+            raise
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+def _percentile(values: list, share: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * share))] if values else 0.0
+
+
+async def run_load(config: LoadConfig) -> dict:
+    """Держит нагрузку duration секунд и возвращает задержки и статусы ответов быстрых клиентов"""
+
+    request: bytes = build_request(config)
+    latencies: list = []
+    statuses: dict = {}
+    counters: dict = {'slow_completed': 0, 'slow_errors': 0, 'fast_unfinished': 0}
+    tasks: list = [asyncio.create_task(_slow_client(config, request, counters)) for _ in range(config.slow_clients)]
+    # медленные клиенты успевают занять соединения до начала замера
+    await asyncio.sleep(min(1.0, config.duration / 10))
+    tasks += [asyncio.create_task(_fast_client(config, request, latencies, statuses, counters))
+              for _ in range(config.fast_clients)]
+    await asyncio.sleep(config.duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    ok: int = sum(count for status, count in statuses.items() if status.startswith('2') or status == '304')
+    return {
+        'url': config.url,
+        'slow_clients': config.slow_clients,
+        'fast_clients': config.fast_clients,
+        'duration': config.duration,
+        'requests': len(latencies),
+        'ok': ok,
+        'rps': round(ok / config.duration, 2),
+        'statuses': statuses,
+        'p50_ms': round(_percentile(latencies, 0.5), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'p99_ms': round(_percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        **counters,
+    }
@@ -0,0 +1,51 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from goals.benchmark import ROUTES, run_benchmark
+from goals.synthetic import SyntheticConfig
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержки и число SQL-запросов маршрутов goals и core на синтетических данных'
+
+    def add_arguments(self, parser) -> None:
+        defaults = SyntheticConfig()
+        for name in ('users', 'boards', 'participants', 'categories', 'goals', 'comments', 'seed'):
+            parser.add_argument(f'--{name}', type=int, default=getattr(defaults, name))
+        parser.add_argument('--skew', type=float, default=defaults.skew)
+        parser.add_argument('--repeat', type=int, default=20, help='Сколько раз выполняется каждый запрос')
+        parser.add_argument('--route', action='append', default=[], help='Замерять только запросы с этой меткой')
+        parser.add_argument('--output', help='Файл для результатов в JSON')
+        parser.add_argument('--baseline', help='JSON прошлого замера для сравнения')
+
+    def handle(self, *args, **kwargs) -> None:
+        """Замер маршрутов с проверкой лимитов SQL-запросов"""
+
+        config = SyntheticConfig(**{name: kwargs[name] for name in (
+            'users', 'boards', 'participants', 'categories', 'goals', 'comments', 'skew', 'seed')})
+        routes: list = [route for route in ROUTES if not kwargs['route'] or route.label in kwargs['route']]
+        if not routes:
+            raise CommandError(f"Неизвестные маршруты: {', '.join(kwargs['route'])}")
+
+        report: dict = run_benchmark(config, kwargs['repeat'], routes)
+        baseline: dict = {}
+        if kwargs['baseline']:
+            with open(kwargs['baseline'], encoding='utf-8') as file:
+                baseline = {result['label']: result for result in json.load(file)['routes']}
+
+        for result in report['routes']:
+            line: str = (f"{result['label']:<26} {result['method']:<6} запросов {result['queries']:>3}"
+                         f"/{result['budget']:<3} p50 {result['p50_ms']:>8.2f} мс  p95 {result['p95_ms']:>8.2f} мс")
+            previous: dict | None = baseline.get(result['label'])
+            if previous:
+                line += f"  (p50 было {previous['p50_ms']:.2f} мс, запросов {previous['queries']})"
+            if result['over_budget'] or result['failed']:
+                line += f"  ОШИБКА: статусы {result['statuses']}"
+            self.stdout.write(line)
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2, default=str)
+
+        broken: list = [result['label'] for result in report['routes'] if result['over_budget'] or result['failed']]
+        if broken:
+            raise CommandError(f"Превышен лимит запросов или получена ошибка: {', '.join(broken)}")
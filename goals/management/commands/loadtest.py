@@ -0,0 +1,55 @@
+import asyncio
+import json
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from core.models import User
+from goals.loadtest import LoadConfig, run_load
+
+
+class Command(BaseCommand):
+    help = 'Нагружает работающий сервер медленными клиентами и замеряет задержку быстрых'
+
+    def add_arguments(self, parser) -> None:
+        defaults = LoadConfig(url='')
+        parser.add_argument('url', help='Адрес запроса, например http://127.0.0.1:8000/goals/goal/list?limit=20')
+        parser.add_argument('--user', default='seed_0',
+                            help='От чьего имени запросы (токен выпускается по этой базе), по умолчанию владелец '
+                                 'досок из manage.py seed')
+        parser.add_argument('--token', default='', help='Готовый access-токен вместо --user')
+        for name in ('slow_clients', 'fast_clients'):
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=getattr(defaults, name))
+        for name in ('slow_interval', 'duration', 'timeout'):
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=float, default=getattr(defaults, name))
+        parser.add_argument('--label', default='', help='Подпись замера, например sync или asgi')
+        parser.add_argument('--output', help='Файл для результатов в JSON')
+        parser.add_argument('--baseline', help='JSON прошлого замера для сравнения')
+
+    def handle(self, *args, **kwargs) -> None:
+        """Нагрузка и отчёт о задержке быстрых клиентов"""
+
+        token: str = kwargs['token']
+        if not token:
+            user: User | None = User.objects.filter(username=kwargs['user']).first()
+            if user is None:
+                raise CommandError(f"Пользователь {kwargs['user']} не найден, задайте --user или --token")
+            token = str(AccessToken.for_user(user))
+
+        config = LoadConfig(url=kwargs['url'], token=token, **{name: kwargs[name] for name in (
+            'slow_clients', 'fast_clients', 'slow_interval', 'duration', 'timeout')})
+        report: dict = {'label': kwargs['label'], **asyncio.run(run_load(config))}
+
+        self.stdout.write(
+            f"{report['label'] or report['url']}: медленных клиентов {report['slow_clients']}, "
+            f"успешных ответов {report['ok']}/{report['requests']} ({report['rps']} в секунду), "
+            f"p50 {report['p50_ms']:.2f} мс, p95 {report['p95_ms']:.2f} мс, max {report['max_ms']:.2f} мс, "
+            f"статусы {report['statuses']}, без ответа к концу замера {report['fast_unfinished']}")
+        if kwargs['baseline']:
+            with open(kwargs['baseline'], encoding='utf-8') as file:
+                previous: dict = json.load(file)
+            self.stdout.write(
+                f"{previous['label'] or previous['url']}: успешных ответов {previous['ok']}/{previous['requests']} "
+                f"({previous['rps']} в секунду), p50 {previous['p50_ms']:.2f} мс, p95 {previous['p95_ms']:.2f} мс")
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
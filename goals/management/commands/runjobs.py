@@ -0,0 +1,35 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from goals.jobs import ArchiveWorker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи архивирования удалённых досок и категорий'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда готовых задач нет')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE,
+            help='Сколько целей архивируется за один шаг')
+
+    def handle(self, *args, **kwargs) -> None:
+        """Цикл выполнения задач архивирования"""
+
+        worker = ArchiveWorker(batch_size=kwargs['batch_size'])
+        self.stdout.write("Обработчик задач запущен")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    processed: bool = worker.run_once()
+                except Exception as e:
+                    self.stdout.write(f"Ошибка: {e}")
+                    processed = False
+                if not processed:
+                    time.sleep(kwargs['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("\nОбработчик задач остановлен")
@@ -0,0 +1,41 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from goals.synthetic import SYNTHETIC_PASSWORD, SyntheticConfig, generate
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу синтетическими досками, категориями, целями и комментариями реалистичного объёма'
+
+    def add_arguments(self, parser) -> None:
+        defaults = SyntheticConfig(users=1000, boards=2000, participants=3, categories=4,
+                                   goals=1_000_000, comments=2, batch_size=5000, prefix='seed')
+        for name in ('users', 'boards', 'participants', 'categories', 'goals', 'comments', 'seed', 'batch_size'):
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=getattr(defaults, name))
+        parser.add_argument('--skew', type=float, default=defaults.skew,
+                            help='Неравномерность размеров досок: 0 — поровну, больше — сильнее перекос')
+        parser.add_argument('--prefix', default=defaults.prefix, help='Префикс имён пользователей')
+        parser.add_argument('--reference-date', type=date.fromisoformat, default=defaults.reference_date,
+                            help='Дата ГГГГ-ММ-ДД, от которой отсчитываются дедлайны целей')
+
+    def handle(self, *args, **kwargs) -> None:
+        """Генерация данных с выводом прогресса"""
+
+        config = SyntheticConfig(**{name: kwargs[name] for name in (
+            'users', 'boards', 'participants', 'categories', 'goals', 'comments', 'skew', 'seed', 'batch_size',
+            'prefix', 'reference_date')})
+        if config.users < 1 or config.boards < 1:
+            raise CommandError("Нужен хотя бы один пользователь и одна доска")
+        if User.objects.filter(username=f"{config.prefix}_0").exists():
+            raise CommandError(f"Данные с префиксом {config.prefix} уже есть, укажите другой --prefix")
+
+        started: float = time.monotonic()
+
+        def progress(name: str, count: int) -> None:
+            self.stdout.write(f"\r{name}: {count} ({time.monotonic() - started:.0f} с)", ending='')
+            self.stdout.flush()
+
+        generate(config, progress, keep_ids=False)
+        self.stdout.write(f"\nГотово за {time.monotonic() - started:.0f} с. "
+                          f"Пароль пользователей {config.prefix}_N: {SYNTHETIC_PASSWORD}")
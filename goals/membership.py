@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from core.caches import is_shared_cache
+from core.models import User
+from goals.models import BoardParticipant
+
+BOARD_ROLES_ATTR = '_board_roles'
+BOARD_ROLES_CACHE_KEY = 'board_roles:{user_id}'
+
+
+def _cache_key(user_id: int) -> str:
+    return BOARD_ROLES_CACHE_KEY.format(user_id=user_id)
+
+
+def _cache_timeout() -> int:
+    """Время межзапросного кэша ролей; 0 для кэша своего процесса: сброс в одном воркере не дошёл бы до остальных"""
+
+    return settings.BOARD_ROLES_CACHE_TIMEOUT if is_shared_cache() else 0
+
+
+def _load_board_roles(user: User) -> dict[int, int]:
+    """Загружает роли пользователя во всех неудалённых досках одним запросом"""
+
+    timeout: int = _cache_timeout()
+    if timeout:
+        roles = cache.get(_cache_key(user.id))
+        if roles is not None:
+            return roles
+
+    roles = dict(BoardParticipant.objects.filter(
+        user=user,
+        board__is_deleted=False
+    ).values_list('board_id', 'role'))
+
+    if timeout:
+        cache.set(_cache_key(user.id), roles, timeout)
+    return roles
+
+
+def get_board_roles(user: User) -> dict[int, int]:
+    """Возвращает {board_id: role} пользователя, запоминая результат на время запроса"""
+
+    if not user.is_authenticated:
+        return {}
+
+    roles = getattr(user, BOARD_ROLES_ATTR, None)
+    if roles is None:
+        roles = _load_board_roles(user)
+        setattr(user, BOARD_ROLES_ATTR, roles)
+    return roles
+
+
+async def aget_board_roles(user: User) -> dict[int, int]:
+    """Асинхронный get_board_roles для async-представлений.
+
+    Роли запоминаются на пользователе так же, поэтому последующие синхронные
+    проверки ролей в этом запросе не обращаются к БД.
+    """
+
+    if not user.is_authenticated:
+        return {}
+
+    roles = getattr(user, BOARD_ROLES_ATTR, None)
+    if roles is not None:
+        return roles
+
+    timeout: int = _cache_timeout()
+    if timeout:
+        roles = await cache.aget(_cache_key(user.id))
+    if roles is None:
+        roles = {board_id: role async for board_id, role in BoardParticipant.objects.filter(
+            user=user,
+            board__is_deleted=False
+        ).values_list('board_id', 'role')}
+        if timeout:
+            await cache.aset(_cache_key(user.id), roles, timeout)
+    setattr(user, BOARD_ROLES_ATTR, roles)
+    return roles
+
+
+def get_board_role(user: User, board_id: int) -> int | None:
+    """Возвращает роль пользователя в доске или None, если он не участник"""
+
+    return get_board_roles(user).get(board_id)
+
+
+def invalidate_board_roles(user_ids) -> None:
+    """Сбрасывает межзапросный кэш ролей для указанных пользователей после фиксации транзакции.
+
+    Сброс до фиксации не помогает: параллельный запрос успевает снова положить
+    в кэш роли, прочитанные из БД до коммита, и они живут до истечения кэша.
+    """
+
+    if _cache_timeout():
+        keys: list = [_cache_key(user_id) for user_id in set(user_ids)]
+        transaction.on_commit(lambda: cache.delete_many(keys))
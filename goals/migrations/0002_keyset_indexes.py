@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(fields=["-created", "-id"], name="goal_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(fields=["due_date", "id"], name="goal_due_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(fields=["priority", "id"], name="goal_priority_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(fields=["title", "id"], name="goal_title_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="goalcomment",
+            index=models.Index(
+                fields=["goal", "-created", "-id"], name="comment_goal_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goalcomment",
+            index=models.Index(
+                fields=["-created", "-id"], name="comment_created_id_idx"
+            ),
+        ),
+    ]
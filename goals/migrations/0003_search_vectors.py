@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:15
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Поисковые векторы поддерживаются триггерами PostgreSQL, поэтому обновляются
+# при любой записи текста (включая bulk_create и raw SQL). В остальных СУБД
+# колонки остаются пустыми, а поиск выполняется по вхождению подстроки.
+# Конфигурация russian стеммит кириллицу и латиницу (english_stem), а simple
+# хранит слова без стемминга, чтобы префиксный поиск находил недописанные слова.
+SEARCH_TABLES = (
+    # таблица, исходные колонки, выражение вектора, GIN-индекс
+    (
+        "goals_goal",
+        "title, description",
+        "setweight(to_tsvector('russian', coalesce({row}title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce({row}description, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce({row}description, '')), 'B')",
+        "goal_search_vector_idx",
+    ),
+    (
+        "goals_goalcomment",
+        "text",
+        "to_tsvector('russian', coalesce({row}text, '')) || "
+        "to_tsvector('simple', coalesce({row}text, ''))",
+        "comment_search_vector_idx",
+    ),
+)
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, columns, vector, index in SEARCH_TABLES:
+        schema_editor.execute(f"""
+            CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {vector.format(row='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+            """)
+        schema_editor.execute(
+            f"CREATE TRIGGER {table}_search_vector_trigger "
+            f"BEFORE INSERT OR UPDATE OF {columns} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();"
+        )
+        schema_editor.execute(
+            f"UPDATE {table} SET search_vector = {vector.format(row='')};"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {index} ON {table} USING gin (search_vector);"
+        )
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, _, _, index in SEARCH_TABLES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index};")
+        schema_editor.execute(
+            f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};"
+        )
+        schema_editor.execute(
+            f"DROP FUNCTION IF EXISTS {table}_search_vector_update();"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0002_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="goal",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="Поисковый вектор"
+            ),
+        ),
+        migrations.AddField(
+            model_name="goalcomment",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="Поисковый вектор"
+            ),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
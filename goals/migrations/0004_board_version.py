@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0003_search_vectors"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="board",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                default=0, editable=False, verbose_name="Версия содержимого"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0004_board_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="goal",
+            name="board",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="goals",
+                to="goals.board",
+                verbose_name="Доска",
+            ),
+        ),
+        migrations.AddField(
+            model_name="goalcomment",
+            name="board",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="comments",
+                to="goals.board",
+                verbose_name="Доска",
+            ),
+        ),
+    ]
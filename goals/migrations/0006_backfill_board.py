@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_board(apps, schema_editor) -> None:
+    """Заполняет доску целей из их категорий, а доску комментариев — из их целей"""
+
+    Goal = apps.get_model("goals", "Goal")
+    GoalCategory = apps.get_model("goals", "GoalCategory")
+    GoalComment = apps.get_model("goals", "GoalComment")
+
+    Goal.objects.update(
+        board_id=Subquery(GoalCategory.objects.filter(id=OuterRef("category_id")).values("board_id")))
+    GoalComment.objects.update(
+        board_id=Subquery(Goal.objects.filter(id=OuterRef("goal_id")).values("board_id")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0005_goal_board"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_board, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0006_backfill_board"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="goal",
+            name="board",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="goals",
+                to="goals.board",
+                verbose_name="Доска",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="goalcomment",
+            name="board",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="comments",
+                to="goals.board",
+                verbose_name="Доска",
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0007_goal_board_required"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="boardparticipant",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="participants",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="goal",
+            name="board",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="goals",
+                to="goals.board",
+                verbose_name="Доска",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="goal",
+            name="category",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="goals.goalcategory",
+                verbose_name="Категория",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="goalcomment",
+            name="board",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="comments",
+                to="goals.board",
+                verbose_name="Доска",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="boardparticipant",
+            index=models.Index(
+                fields=["user", "board", "role"], name="participant_user_board_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(
+                fields=["category", "status", "-created"],
+                name="goal_category_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(
+                fields=["board", "status", "-created"], name="goal_board_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goal",
+            index=models.Index(
+                condition=models.Q(("status__in", [1, 2])),
+                fields=["user", "-created", "-id"],
+                name="goal_user_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goalcategory",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["board", "title"],
+                name="category_board_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="goalcomment",
+            index=models.Index(
+                fields=["board", "-created", "-id"], name="comment_board_created_idx"
+            ),
+        ),
+    ]
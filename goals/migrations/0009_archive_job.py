@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("goals", "0008_query_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата обновления"),
+                ),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "В очереди"),
+                            (2, "Выполняется"),
+                            (3, "Завершена"),
+                            (4, "Ошибка"),
+                        ],
+                        default=1,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "archived",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Архивировано целей"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Ошибок подряд"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, default="", verbose_name="Последняя ошибка"
+                    ),
+                ),
+                (
+                    "lease_until",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Занята воркером до",
+                    ),
+                ),
+                (
+                    "finished",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата завершения"
+                    ),
+                ),
+                (
+                    "board",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archive_jobs",
+                        to="goals.board",
+                        verbose_name="Доска",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archive_jobs",
+                        to="goals.goalcategory",
+                        verbose_name="Категория",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archive_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задача архивирования",
+                "verbose_name_plural": "Задачи архивирования",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status__in", [1, 2])),
+                        fields=["lease_until", "id"],
+                        name="archive_job_due_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 from core.models import User
 
@@ -14,10 +16,20 @@ class BaseDateTime(models.Model):
 class Board(BaseDateTime):
     title = models.CharField(max_length=255, verbose_name="Название")
     is_deleted = models.BooleanField(default=False, verbose_name="Удалена")
+    version = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Версия содержимого")
 
     def __str__(self):
         return f"доска {self.title}"
 
+    def save(self, *args, **kwargs) -> None:
+        """Сохраняет доску, не перезаписывая version: её увеличивает только bump_board_versions"""
+
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'version']
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Доска"
         verbose_name_plural = "Доски"
@@ -28,6 +40,10 @@ class BoardParticipant(BaseDateTime):
         unique_together = ("board", "user")
         verbose_name = "Участник"
         verbose_name_plural = "Участники"
+        indexes = [
+            # роли пользователя во всех досках читаются только из индекса
+            models.Index(fields=["user", "board", "role"], name="participant_user_board_idx"),
+        ]
 
     class Role(models.IntegerChoices):
         owner = 1, "Владелец"
@@ -45,6 +61,7 @@ class BoardParticipant(BaseDateTime):
         verbose_name="Пользователь",
         on_delete=models.PROTECT,
         related_name="participants",
+        db_index=False,
     )
     role = models.PositiveSmallIntegerField(
         verbose_name="Роль", choices=Role.choices, default=Role.owner
@@ -74,16 +91,40 @@ class GoalCategory(BaseDateTime):
     def __str__(self):
         return f" категория {self.title} пользователя {self.user}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> 'GoalCategory':
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_board_id = instance.__dict__.get('board_id')
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        """Сохраняет категорию; при переносе в другую доску переносит и её цели с комментариями"""
+
+        adding: bool = self._state.adding
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if not adding and (update_fields is None or 'board' in update_fields):
+            moved: list = list(
+                Goal.objects.filter(category=self).exclude(board_id=self.board_id).values_list('id', flat=True))
+            if moved:
+                Goal.objects.filter(id__in=moved).update(board_id=self.board_id)
+                GoalComment.objects.filter(goal_id__in=moved).update(board_id=self.board_id)
+        self._loaded_board_id = self.board_id
+
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
+        indexes = [
+            models.Index(fields=["board", "title"], condition=models.Q(is_deleted=False),
+                         name="category_board_active_idx"),
+        ]
 
 
 class Goal(BaseDateTime):
     title = models.CharField(max_length=155, verbose_name="Название", )
     description = models.TextField(blank=True, default="", verbose_name="Описание")
     user = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name="Автор")
-    category = models.ForeignKey(GoalCategory, on_delete=models.PROTECT, verbose_name="Категория")
+    category = models.ForeignKey(GoalCategory, on_delete=models.PROTECT, db_index=False, verbose_name="Категория")
     status = models.PositiveSmallIntegerField(
         choices=Status.choices, default=Status.to_do, verbose_name="Статус"
     )
@@ -91,23 +132,118 @@ class Goal(BaseDateTime):
         choices=Priority.choices, default=Priority.medium, verbose_name="Приоритет"
     )
     due_date = models.DateField(null=True, blank=True, verbose_name="Дедлайн")
+    # копия category.board_id: права и списки проверяются без join через категорию
+    board = models.ForeignKey(
+        Board, on_delete=models.PROTECT, related_name="goals", editable=False, db_index=False, verbose_name="Доска")
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="Поисковый вектор")
 
     def __str__(self):
         return f"{self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> 'Goal':
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        instance._loaded_board_id = instance.__dict__.get('board_id')
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        """Сохраняет цель, синхронизируя board с доской категории (и доску комментариев при переносе).
+
+        Категория читается только у новой цели и при смене категории.
+        """
+
+        update_fields = kwargs.get('update_fields')
+        category_changed: bool = self.board_id is None or self.category_id != getattr(self, '_loaded_category_id', None)
+        if category_changed and (update_fields is None or 'category' in update_fields):
+            board_id: int = self.category.board_id
+            moved: bool = self.pk is not None and self.board_id not in (None, board_id)
+            self.board_id = board_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'board'}
+            super().save(*args, **kwargs)
+            if moved:
+                self.comments.update(board_id=board_id)
+        else:
+            super().save(*args, **kwargs)
+        self._loaded_category_id = self.category_id
+        self._loaded_board_id = self.board_id
+
     class Meta:
         verbose_name = "Цель"
         verbose_name_plural = "Цели"
+        indexes = [
+            models.Index(fields=["-created", "-id"], name="goal_created_id_idx"),
+            models.Index(fields=["due_date", "id"], name="goal_due_date_id_idx"),
+            models.Index(fields=["priority", "id"], name="goal_priority_id_idx"),
+            models.Index(fields=["title", "id"], name="goal_title_id_idx"),
+            # индексы по category, board и user заменяют одиночные индексы внешних ключей
+            models.Index(fields=["category", "status", "-created"], name="goal_category_status_idx"),
+            models.Index(fields=["board", "status", "-created"], name="goal_board_status_idx"),
+            models.Index(fields=["user", "-created", "-id"],
+                         condition=models.Q(status__in=[Status.to_do, Status.in_progress]),
+                         name="goal_user_active_idx"),
+        ]
 
 
 class GoalComment(BaseDateTime):
     text = models.TextField(verbose_name="Текст")
     user = models.ForeignKey(User, on_delete=models.PROTECT, verbose_name="Автор")
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='comments', verbose_name="Цель")
+    # копия goal.board_id
+    board = models.ForeignKey(
+        Board, on_delete=models.PROTECT, related_name="comments", editable=False, db_index=False,
+        verbose_name="Доска")
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="Поисковый вектор")
 
     def __str__(self):
         return f"Коммент от: {self.user.username}"
 
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'goal' in update_fields:
+            self.board_id = self.goal.board_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'board'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(fields=["goal", "-created", "-id"], name="comment_goal_created_id_idx"),
+            models.Index(fields=["-created", "-id"], name="comment_created_id_idx"),
+            models.Index(fields=["board", "-created", "-id"], name="comment_board_created_idx"),
+        ]
+
+
+class ArchiveJob(BaseDateTime):
+    """Фоновое архивирование целей удалённой доски или категории, выполняется порциями командой runjobs"""
+
+    class Status(models.IntegerChoices):
+        pending = 1, "В очереди"
+        running = 2, "Выполняется"
+        done = 3, "Завершена"
+        failed = 4, "Ошибка"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archive_jobs", verbose_name="Автор")
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="archive_jobs", verbose_name="Доска")
+    # если задана, архивируются только цели этой категории, иначе — вся доска
+    category = models.ForeignKey(
+        GoalCategory, null=True, blank=True, on_delete=models.CASCADE, related_name="archive_jobs",
+        verbose_name="Категория")
+    status = models.PositiveSmallIntegerField(
+        choices=Status.choices, default=Status.pending, verbose_name="Статус")
+    archived = models.PositiveIntegerField(default=0, verbose_name="Архивировано целей")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Ошибок подряд")
+    last_error = models.TextField(blank=True, default="", verbose_name="Последняя ошибка")
+    lease_until = models.DateTimeField(default=timezone.now, verbose_name="Занята воркером до")
+    finished = models.DateTimeField(null=True, blank=True, verbose_name="Дата завершения")
+
+    class Meta:
+        verbose_name = "Задача архивирования"
+        verbose_name_plural = "Задачи архивирования"
+        indexes = [
+            models.Index(fields=["lease_until", "id"], condition=models.Q(status__in=[1, 2]),
+                         name="archive_job_due_idx"),
+        ]
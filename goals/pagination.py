@@ -0,0 +1,189 @@
+import base64
+import binascii
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import F, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Пагинация limit/offset по умолчанию и курсорная (keyset) при наличии параметра cursor.
+
+    Курсор хранит значения полей сортировки последней записи страницы, поэтому
+    следующая страница выбирается условием WHERE по индексу без COUNT(*) и OFFSET.
+    Первая страница запрашивается с пустым курсором: ?cursor=&limit=20.
+    """
+
+    cursor_query_param = 'cursor'
+    keyset_default_limit = 20
+    max_limit = 100
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list | None:
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        queryset, position, reverse = self._keyset_queryset(queryset, request)
+        return self._keyset_page(list(queryset[:self.limit + 1]), position, reverse)
+
+    async def apaginate_queryset(self, queryset: QuerySet, request: Request, view=None) -> list | None:
+        """paginate_queryset на async ORM: COUNT(*) и страница выбираются без блокировки цикла событий"""
+
+        self.keyset = self.cursor_query_param in request.query_params
+        if self.keyset:
+            queryset, position, reverse = self._keyset_queryset(queryset, request)
+            return self._keyset_page([obj async for obj in queryset[:self.limit + 1]], position, reverse)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [obj async for obj in queryset[self.offset:self.offset + self.limit]]
+
+    def _keyset_queryset(self, queryset: QuerySet, request: Request) -> tuple[QuerySet, list | None, bool]:
+        """Запрос страницы после позиции из курсора, отсортированный по полям сортировки с id"""
+
+        self.request = request
+        self.limit = self.get_limit(request) or self.keyset_default_limit
+        self.ordering = self._get_ordering(queryset)
+        self.fields = {name: self._get_field(queryset, name) for name, _ in self.ordering}
+        position, reverse = self._decode_cursor(request)
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+        return queryset, position, reverse
+
+    def _keyset_page(self, results: list, position: list | None, reverse: bool) -> list:
+        """Страница из limit + 1 выбранных записей и позиции для ссылок next и previous"""
+
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self._position(results[-1]) if results and (has_more or reverse) else None
+        self.previous_position = None
+        if results and position is not None and (has_more or not reverse):
+            self.previous_position = self._position(results[0])
+        return results
+
+    def get_paginated_response(self, data: list) -> Response:
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'next': self._get_link(self.next_position, reverse=False),
+            'previous': self._get_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def _get_ordering(self, queryset: QuerySet) -> list[tuple[str, bool]]:
+        """Возвращает сортировку запроса в виде [(поле, по убыванию)] с id в конце для однозначности"""
+
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            ordering = list(queryset.model._meta.ordering) or ['-id']
+
+        fields = []
+        for field in ordering:
+            name = field.lstrip('-')
+            fields.append(('id' if name == 'pk' else name, field.startswith('-')))
+        if 'id' not in (name for name, _ in fields):
+            fields.append(('id', fields[0][1]))
+        return fields
+
+    def _get_field(self, queryset: QuerySet, name: str):
+        """Возвращает поле модели или аннотации, по которому идёт сортировка"""
+
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _is_nullable(self, name: str) -> bool:
+        return bool(getattr(self.fields[name], 'null', False))
+
+    def _order_by(self, reverse: bool) -> list:
+        """Строит ORDER BY; NULL всегда в конце при прямом обходе и в начале при обратном"""
+
+        expressions = []
+        for name, descending in self.ordering:
+            nulls: dict = {}
+            if self._is_nullable(name):
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            field = F(name)
+            expressions.append(field.desc(**nulls) if descending != reverse else field.asc(**nulls))
+        return expressions
+
+    def _after(self, position: list, reverse: bool) -> Q:
+        """Условие «строго после позиции» для лексикографического порядка по полям сортировки"""
+
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.ordering, position):
+            descending = descending != reverse
+            nulls_last = not reverse
+            if value is None:
+                if not nulls_last:
+                    condition |= equal & Q(**{f'{name}__isnull': False})
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+
+            after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if nulls_last and self._is_nullable(name):
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def _position(self, obj) -> list:
+        values = []
+        for name, _ in self.ordering:
+            value = getattr(obj, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return values
+
+    def _decode_cursor(self, request: Request) -> tuple[list | None, bool]:
+        encoded: str = request.query_params.get(self.cursor_query_param, '')
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if payload['o'] != self._ordering_key() or len(payload['v']) != len(self.ordering):
+                raise ValueError
+            position = [None if value is None else self.fields[name].to_python(value)
+                        for (name, _), value in zip(self.ordering, payload['v'])]
+            return position, bool(payload.get('r'))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _ordering_key(self) -> list[str]:
+        return [f'-{name}' if descending else name for name, descending in self.ordering]
+
+    def _get_link(self, position: list | None, reverse: bool) -> str | None:
+        if position is None:
+            return None
+
+        payload: dict = {'o': self._ordering_key(), 'v': position}
+        if reverse:
+            payload['r'] = True
+        cursor = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
@@ -1,60 +1,53 @@
 from rest_framework import permissions
 from core.models import User
+from goals.membership import get_board_role
 from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment
 from rest_framework.request import Request
 
 
-def has_board_permissions(user: User, board: Board, required_roles: list | None) -> bool:
+def has_board_permissions(user: User, board_id: int, required_roles: list | None) -> bool:
     """Проверяет, есть ли у пользователя доступ к доске с указанными ролями"""
 
-    queryset = BoardParticipant.objects.filter(
-        user=user,
-        board=board,
-        board__is_deleted=False
-    )
-    if required_roles is not None:
-        queryset = queryset.filter(role__in=required_roles)
-    return queryset.exists()
+    role: int | None = get_board_role(user, board_id)
+    if role is None:
+        return False
+    return required_roles is None or role in required_roles
 
 
 class BoardPermission(permissions.BasePermission):
     WRITE_ROLES = [BoardParticipant.Role.owner, BoardParticipant.Role.writer]
 
-    def _get_board_from_object(self, obj) -> Board | None:
-        """Извлекает объект доски из переданного объекта (доска, категория, цель, комментарий)"""
+    def _get_board_id(self, obj) -> int | None:
+        """Извлекает id доски из переданного объекта (доска, категория, цель, комментарий) без запросов к БД"""
 
         if isinstance(obj, Board):
-            return obj
-        if isinstance(obj, GoalComment):
-            return obj.goal.category.board
-        if isinstance(obj, Goal):
-            return obj.category.board
-        if isinstance(obj, GoalCategory):
-            return obj.board
+            return obj.id
+        if isinstance(obj, (GoalCategory, Goal, GoalComment)):
+            return obj.board_id
         return None
 
     def has_object_permission(self, request: Request, view, obj) -> bool:
         """Проверяет доступ к возможности редактировать обьекты"""
 
-        board = self._get_board_from_object(obj)
-        if not board:
+        board_id: int | None = self._get_board_id(obj)
+        if board_id is None:
             return False
 
         if isinstance(obj, GoalComment):
-            return self._check_comment_permission(request, obj, board)
+            return self._check_comment_permission(request, obj, board_id)
 
         required_roles = None if request.method in permissions.SAFE_METHODS else self.WRITE_ROLES
-        return has_board_permissions(request.user, board, required_roles)
+        return has_board_permissions(request.user, board_id, required_roles)
 
-    def _check_comment_permission(self, request: Request, comment: GoalComment, board: Board) -> bool:
+    def _check_comment_permission(self, request: Request, comment: GoalComment, board_id: int) -> bool:
         """Проверяет доступ к возможности редактировать комментарии, даже reader должен иметь возможность редактировать свой коммент"""
 
         user: User = request.user
 
         if request.method in permissions.SAFE_METHODS:
-            return has_board_permissions(user, board, required_roles=None)
+            return has_board_permissions(user, board_id, required_roles=None)
 
-        if comment.user == user:
+        if comment.user_id == user.id:
             return True
 
-        return has_board_permissions(user, board, required_roles=self.WRITE_ROLES)
+        return has_board_permissions(user, board_id, required_roles=self.WRITE_ROLES)
@@ -0,0 +1,49 @@
+import re
+from functools import reduce
+from operator import or_
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q, QuerySet
+from django.db.models.functions import Cast, Coalesce
+from goals.models import GoalComment
+
+SEARCH_CONFIGS = ('russian', 'simple')
+SEARCH_RANK = 'search_rank'
+
+
+def build_search_query(value: str) -> SearchQuery | None:
+    """Строит префиксный tsquery по словам запроса: со стеммингом и по исходным словам"""
+
+    words: list = re.findall(r'\w+', value)
+    if not words:
+        return None
+
+    raw: str = ' & '.join(f'{word}:*' for word in words)
+    return reduce(or_, (SearchQuery(raw, config=config, search_type='raw') for config in SEARCH_CONFIGS))
+
+
+def search_goals(queryset: QuerySet, value: str) -> QuerySet:
+    """Ищет цели по названию, описанию и тексту комментариев.
+
+    В PostgreSQL использует индексированные tsvector-колонки и добавляет ранг
+    совпадения search_rank, в остальных СУБД выполняет поиск по вхождению подстроки.
+    """
+
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.filter(
+            Q(title__icontains=value) |
+            Q(description__icontains=value) |
+            Q(id__in=GoalComment.objects.filter(text__icontains=value).values('goal_id'))
+        )
+
+    query = build_search_query(value)
+    if query is None:
+        return queryset
+
+    return queryset.filter(
+        Q(search_vector=query) |
+        Q(id__in=GoalComment.objects.filter(search_vector=query).values('goal_id'))
+    ).annotate(**{
+        # ts_rank возвращает real; double precision сохраняет значение точным в курсоре пагинации
+        SEARCH_RANK: Coalesce(Cast(SearchRank(F('search_vector'), query), FloatField()), 0.0)
+    })
@@ -1,10 +1,13 @@
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.serializers import ValidationError
 from core.models import User
 from rest_framework.request import Request
-from goals.models import GoalCategory, Goal, GoalComment, Board, BoardParticipant
+from goals.models import ArchiveJob, GoalCategory, Goal, GoalComment, Board, BoardParticipant
+from goals.caching import bump_board_versions
+from goals.membership import get_board_role, invalidate_board_roles
 from goals.permissions import has_board_permissions
 
 
@@ -13,7 +16,7 @@ def check_board_write_permission(user: User, board: Board) -> bool:
 
     return has_board_permissions(
         user=user,
-        board=board,
+        board_id=board.id,
         required_roles=[BoardParticipant.Role.owner, BoardParticipant.Role.writer])
 
 
@@ -76,7 +79,7 @@ class GoalSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Goal
-        fields = "__all__"
+        exclude = ("search_vector", "board")
         read_only_fields = ("id", "created", "updated", "user")
 
     def validate_category(self, category: GoalCategory) -> GoalCategory:
@@ -94,6 +97,57 @@ class GoalSerializer(serializers.ModelSerializer):
 
         return category
 
+    def to_representation(self, instance: Goal) -> dict:
+        # после обновления DRF сбрасывает кеш prefetch, без повторной загрузки авторы комментариев читаются по одному
+        if 'comments' in self.fields and 'comments' not in getattr(instance, '_prefetched_objects_cache', {}):
+            prefetch_related_objects(
+                [instance], Prefetch('comments', queryset=GoalComment.objects.select_related('user')))
+        return super().to_representation(instance)
+
+
+class GoalListSerializer(GoalSerializer):
+    """Облегчённое представление цели для списка: вместо комментариев только их количество"""
+
+    comments = None
+    comments_count = serializers.IntegerField(read_only=True)
+
+
+class PreloadedCategoryField(serializers.PrimaryKeyRelatedField):
+    """Категория по id: сначала ищется среди заранее загруженных в context['categories']"""
+
+    def to_internal_value(self, data) -> GoalCategory:
+        preloaded: dict = self.context.get('categories', {})
+        try:
+            return preloaded[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class GoalBulkItemSerializer(GoalSerializer):
+    """Правила GoalSerializer для одной операции пакетного запроса"""
+
+    comments = None
+    category = PreloadedCategoryField(queryset=GoalCategory.objects.select_related('board'))
+
+
+class GoalBulkOperationSerializer(serializers.Serializer):
+    ACTIONS = ('create', 'update', 'archive')
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs: dict) -> dict:
+        if attrs['action'] != 'create' and 'id' not in attrs:
+            raise ValidationError({"id": "Обязательное поле для update и archive"})
+        return attrs
+
+
+class GoalBulkSerializer(serializers.Serializer):
+    MAX_OPERATIONS = 500
+
+    operations = GoalBulkOperationSerializer(many=True, allow_empty=False, max_length=MAX_OPERATIONS)
+
 
 class BoardCreateSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
@@ -101,7 +155,7 @@ class BoardCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Board
         read_only_fields = ("id", "created", "updated")
-        fields = "__all__"
+        exclude = ("version",)
 
     def create(self, validated_data: dict) -> Board:
         user: User = validated_data.pop("user")
@@ -112,14 +166,20 @@ class BoardCreateSerializer(serializers.ModelSerializer):
         return board
 
 
+class UsernameField(serializers.CharField):
+    """Пользователь по username; на входе остаётся строкой, а в объекты пользователей
+    разрешается списком в BoardSerializer.validate_participants одним запросом"""
+
+    def to_representation(self, user: User) -> str:
+        return user.username
+
+
 class BoardParticipantSerializer(serializers.ModelSerializer):
     role: int = serializers.ChoiceField(
         required=True,
         choices=BoardParticipant.Role.choices[1:]
     )
-    user: User = serializers.SlugRelatedField(
-        slug_field="username", queryset=User.objects.all()
-    )
+    user: User = UsernameField()
 
     class Meta:
         model = BoardParticipant
@@ -133,9 +193,27 @@ class BoardSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Board
-        fields = "__all__"
+        exclude = ("version",)
         read_only_fields = ("id", "created", "updated")
 
+    def validate_participants(self, participants: list) -> list:
+        """Заменяет username участников на пользователей, загружая их одним запросом"""
+
+        usernames: set = {part["user"] for part in participants}
+        users: dict = User.objects.in_bulk(usernames, field_name="username")
+        missing: set = usernames - users.keys()
+        if missing:
+            raise ValidationError(f"Пользователи не найдены: {', '.join(sorted(missing))}")
+
+        for part in participants:
+            part["user"] = users[part["user"]]
+        return participants
+
+    def to_representation(self, instance: Board) -> dict:
+        prefetch_related_objects(
+            [instance], Prefetch("participants", queryset=BoardParticipant.objects.select_related("user")))
+        return super().to_representation(instance)
+
     @transaction.atomic
     def update(self, instance: Board, validated_data: dict) -> Board:
         request = self.context.get('request')
@@ -144,35 +222,40 @@ class BoardSerializer(serializers.ModelSerializer):
 
         owner: User = request.user
 
-        if not instance.participants.filter(user=owner, role=BoardParticipant.Role.owner).exists():
+        if get_board_role(owner, instance.id) != BoardParticipant.Role.owner:
             raise ValidationError("Только владелец может редактировать доску")
 
         participants_data: list = validated_data.pop("participants", [])
-        new_by_id: dict = {part["user"].id: part for part in participants_data}
-        old_participants: QuerySet = instance.participants.exclude(user=owner)
-
-        for old_participant in old_participants:
-            user_id: int = old_participant.user_id
-            if user_id not in new_by_id:
-                old_participant.delete()
-            else:
-                new_role = new_by_id[user_id]["role"]
-                if old_participant.role != new_role:
-                    old_participant.role = new_role
-                    old_participant.save()
-                new_by_id.pop(user_id)
-
-        for new_part in new_by_id.values():
-            if new_part["role"] != BoardParticipant.Role.owner:
-                BoardParticipant.objects.create(
-                    board=instance,
-                    user=new_part["user"],
-                    role=new_part["role"]
-                )
+        new_roles: dict = {part["user"].id: part["role"] for part in participants_data if part["user"] != owner}
+        old_by_id: dict = {part.user_id: part for part in instance.participants.exclude(user=owner)}
+
+        removed: list = [part.id for user_id, part in old_by_id.items() if user_id not in new_roles]
+        changed: list = []
+        added: list = []
+        now = timezone.now()
+        for user_id, role in new_roles.items():
+            old_participant = old_by_id.get(user_id)
+            if old_participant is None:
+                added.append(BoardParticipant(board=instance, user_id=user_id, role=role))
+            elif old_participant.role != role:
+                old_participant.role = role
+                old_participant.updated = now
+                changed.append(old_participant)
+
+        if removed:
+            BoardParticipant.objects.filter(id__in=removed).delete()
+        if changed:
+            BoardParticipant.objects.bulk_update(changed, ["role", "updated"])
+        if added:
+            BoardParticipant.objects.bulk_create(added)
+        invalidate_board_roles([part.user_id for part in changed + added])
 
         if 'title' in validated_data:
             instance.title = validated_data.get("title")
             instance.save()
+        elif removed or changed or added:
+            # версию увеличивает save() через сигнал, иначе — один раз на весь состав, а не на каждого участника
+            bump_board_versions([instance.id])
 
         return instance
 
@@ -180,4 +263,11 @@ class BoardSerializer(serializers.ModelSerializer):
 class BoardListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Board
-        fields = "__all__"
+        exclude = ("version",)
+
+
+class ArchiveJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchiveJob
+        fields = ["id", "status", "board", "category", "archived", "last_error", "created", "updated", "finished"]
+        read_only_fields = fields
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from goals.caching import bump_board_versions
+from goals.membership import invalidate_board_roles
+from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment
+
+
+@receiver([post_save, post_delete], sender=BoardParticipant)
+def reset_participant_roles(sender, instance: BoardParticipant, **kwargs) -> None:
+    """Сбрасывает кэш ролей участника при изменении его членства в доске"""
+
+    invalidate_board_roles([instance.user_id])
+
+
+@receiver(post_save, sender=Board)
+def reset_board_roles(sender, instance: Board, created: bool, **kwargs) -> None:
+    """Сбрасывает кэш ролей всех участников доски, чтобы учесть флаг is_deleted"""
+
+    if not created:
+        invalidate_board_roles(instance.participants.values_list('user_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Board)
+def bump_board(sender, instance: Board, created: bool = False, **kwargs) -> None:
+    if not created:
+        bump_board_versions([instance.id])
+
+
+@receiver([post_save, post_delete], sender=GoalComment)
+def bump_comment_board(sender, instance: GoalComment, **kwargs) -> None:
+    """Увеличивает версию доски комментария; состав участников меняется пакетно в BoardSerializer.update,
+    который увеличивает версию сам, поэтому сигналы BoardParticipant версию не трогают"""
+
+    bump_board_versions([instance.board_id])
+
+
+@receiver([post_save, post_delete], sender=GoalCategory)
+@receiver([post_save, post_delete], sender=Goal)
+def bump_goal_board(sender, instance: Goal | GoalCategory, **kwargs) -> None:
+    """Увеличивает версию доски, а при переносе в другую доску — и версию прежней: цель или категория из неё пропадает"""
+
+    # сигнал приходит из super().save(), _loaded_board_id ещё хранит доску до сохранения
+    board_ids: set = {instance.board_id, getattr(instance, '_loaded_board_id', None)}
+    bump_board_versions(board_ids - {None})
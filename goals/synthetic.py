@@ -0,0 +1,151 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Callable
+from django.contrib.auth.hashers import make_password
+from core.models import User
+from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment, Priority, Status
+
+SYNTHETIC_PASSWORD = 'synthetic-pass'
+
+# доля целей в каждом статусе: большинство завершено или в работе, архив — хвост
+STATUS_WEIGHTS: dict = {
+    Status.to_do: 30,
+    Status.in_progress: 20,
+    Status.done: 35,
+    Status.archived: 15,
+}
+PRIORITY_WEIGHTS: dict = {
+    Priority.low: 25,
+    Priority.medium: 45,
+    Priority.high: 20,
+    Priority.critical: 10,
+}
+
+
+@dataclass(slots=True)
+class SyntheticConfig:
+    """Объёмы и распределения синтетических данных; одинаковые параметры и seed дают одинаковый набор.
+
+    participants, categories и comments — средние значения на доску и на цель;
+    skew — показатель степенного распределения целей по доскам (0 — поровну);
+    reference_date — дата, от которой отсчитываются дедлайны (не сегодняшняя, чтобы набор не зависел от дня запуска).
+    """
+
+    users: int = 10
+    boards: int = 5
+    participants: int = 3
+    categories: int = 3
+    goals: int = 200
+    comments: int = 2
+    skew: float = 1.0
+    seed: int = 0
+    batch_size: int = 1000
+    prefix: str = 'synthetic'
+    reference_date: date = date(2026, 1, 1)
+
+
+@dataclass(slots=True)
+class SyntheticData:
+    """Созданные объекты: пользователи и доски целиком, остальное — списками id"""
+
+    users: list = field(default_factory=list)
+    boards: list = field(default_factory=list)
+    category_ids: list = field(default_factory=list)
+    goal_ids: list = field(default_factory=list)
+    comment_ids: list = field(default_factory=list)
+
+
+def _around(rng: random.Random, mean: float) -> int:
+    """Неотрицательное целое с экспоненциальным распределением: чаще мало, изредка много"""
+
+    return round(rng.expovariate(1 / mean)) if mean > 0 else 0
+
+
+def generate(config: SyntheticConfig, progress: Callable[[str, int], None] | None = None,
+             keep_ids: bool = True) -> SyntheticData:
+    """Создаёт пользователей, доски с участниками, категории, цели и комментарии через bulk_create.
+
+    Первый пользователь владеет всеми досками, остальные попадают в доски случайно
+    с ролями редактора и читателя. Цели распределяются по доскам по степенному закону
+    (несколько крупных досок и длинный хвост мелких), число комментариев у цели —
+    экспоненциально. Цели и комментарии пишутся порциями по batch_size, после каждой
+    порции вызывается progress(имя модели, создано всего). Без keep_ids id целей
+    и комментариев не запоминаются, чтобы миллионы строк не держать в памяти.
+    Пароль всех пользователей — SYNTHETIC_PASSWORD, хеш считается один раз.
+    """
+
+    rng = random.Random(config.seed)
+    data = SyntheticData()
+    batch: int = config.batch_size
+    report: Callable[[str, int], None] = progress or (lambda name, count: None)
+
+    password: str = make_password(SYNTHETIC_PASSWORD)
+    data.users = User.objects.bulk_create([
+        User(username=f"{config.prefix}_{i}", email=f"{config.prefix}_{i}@example.com", password=password)
+        for i in range(config.users)], batch_size=batch)
+    owner, others = data.users[0], data.users[1:]
+    report('users', len(data.users))
+
+    data.boards = Board.objects.bulk_create(
+        [Board(title=f"Доска {i}") for i in range(config.boards)], batch_size=batch)
+    report('boards', len(data.boards))
+
+    participants: list = []
+    writers: dict = {}
+    for board in data.boards:
+        participants.append(BoardParticipant(board=board, user=owner, role=BoardParticipant.Role.owner))
+        writers[board.id] = [owner.id]
+        for user in rng.sample(others, min(_around(rng, config.participants), len(others))):
+            role = rng.choice([BoardParticipant.Role.writer, BoardParticipant.Role.reader])
+            participants.append(BoardParticipant(board=board, user=user, role=role))
+            if role == BoardParticipant.Role.writer:
+                writers[board.id].append(user.id)
+    BoardParticipant.objects.bulk_create(participants, batch_size=batch)
+    report('participants', len(participants))
+
+    categories: list = GoalCategory.objects.bulk_create([
+        GoalCategory(title=f"Категория {i}", board=board, user=owner)
+        for board in data.boards for i in range(1 + _around(rng, config.categories - 1))], batch_size=batch)
+    data.category_ids = [category.id for category in categories]
+    report('categories', len(categories))
+
+    by_board: dict = {}
+    for category in categories:
+        by_board.setdefault(category.board_id, []).append(category.id)
+    board_ids: list = list(by_board)
+    board_weights: list = list(accumulate(1 / (rank + 1) ** config.skew for rank in range(len(board_ids))))
+    statuses, status_weights = list(STATUS_WEIGHTS), list(accumulate(STATUS_WEIGHTS.values()))
+    priorities, priority_weights = list(PRIORITY_WEIGHTS), list(accumulate(PRIORITY_WEIGHTS.values()))
+
+    created_goals = created_comments = 0
+    for start in range(0, config.goals, batch):
+        goals: list = []
+        for i in range(start, min(start + batch, config.goals)):
+            board_id: int = rng.choices(board_ids, cum_weights=board_weights)[0]
+            goals.append(Goal(
+                title=f"Цель {i}",
+                description=f"Описание цели {i}",
+                user_id=rng.choice(writers[board_id]),
+                category_id=rng.choice(by_board[board_id]),
+                board_id=board_id,
+                status=rng.choices(statuses, cum_weights=status_weights)[0],
+                priority=rng.choices(priorities, cum_weights=priority_weights)[0],
+                due_date=config.reference_date + timedelta(days=rng.randint(-30, 90)) if rng.random() < 0.5 else None))
+        goals = Goal.objects.bulk_create(goals)
+        created_goals += len(goals)
+        report('goals', created_goals)
+
+        comments: list = GoalComment.objects.bulk_create([
+            GoalComment(text=f"Комментарий {i} к цели {goal.id}", user_id=rng.choice(writers[goal.board_id]),
+                        goal_id=goal.id, board_id=goal.board_id)
+            for goal in goals for i in range(_around(rng, config.comments))], batch_size=batch)
+        created_comments += len(comments)
+        if comments:
+            report('comments', created_comments)
+
+        if keep_ids:
+            data.goal_ids.extend(goal.id for goal in goals)
+            data.comment_ids.extend(comment.id for comment in comments)
+    return data
@@ -1,7 +1,23 @@
+import io
+from datetime import timedelta
+from collections import Counter
 import pytest
-from goals.models import BoardParticipant, GoalComment, Goal, Status, Board, GoalCategory
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from goals.benchmark import ROUTES, run_benchmark
+from goals.jobs import ArchiveWorker
+from goals.loadtest import LoadConfig, build_request, run_load
+from goals.membership import get_board_roles
+from goals.models import ArchiveJob, BoardParticipant, GoalComment, Goal, Status, Board, GoalCategory
+from goals.synthetic import SyntheticConfig
+from goals.views import (AsyncBoardListView, AsyncGoalCommentListView, AsyncGoalListView, BoardListView,
+                         GoalCommentListView, GoalListView)
 from core.models import User
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
 
 
 @pytest.fixture
@@ -105,7 +121,7 @@ def test_board_delete(api_client: APIClient, user: User, board: Board) -> None:
 
     api_client.force_login(user)
     response = api_client.delete(f"/goals/board/{board.id}")
-    assert response.status_code == 204
+    assert response.status_code == 202
     board.refresh_from_db()
     assert board.is_deleted is True
 
@@ -141,9 +157,12 @@ def test_category_delete(api_client: APIClient, user: User, category: GoalCatego
     Goal.objects.create(title="Test Goal", category=category, user=user)
     api_client.force_login(user)
     response = api_client.delete(f"/goals/goal_category/{category.id}")
-    assert response.status_code == 204
+    assert response.status_code == 202
     category.refresh_from_db()
     assert category.is_deleted is True
+
+    while ArchiveWorker().run_once():
+        pass
     assert Goal.objects.filter(category=category, status=Status.archived).exists()
 
 
@@ -350,4 +369,616 @@ def test_owner_can_delete_board(api_client: APIClient, user: User, board: Board)
 
     api_client.force_login(user)
     response = api_client.delete(f"/goals/board/{board.id}")
-    assert response.status_code == 204
+    assert response.status_code == 202
+
+
+@pytest.mark.django_db
+def test_goal_update_loads_board_roles_once(api_client: APIClient, user: User, goal: Goal) -> None:
+    """Тестирует, что роли участника загружаются один раз за запрос"""
+
+    api_client.force_login(user)
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.patch(f"/goals/goal/{goal.id}", {"title": "Renamed"}, format="json")
+    assert response.status_code == 200
+    participant_queries = [q for q in context.captured_queries if 'goals_boardparticipant' in q['sql']]
+    assert len(participant_queries) == 1
+
+
+@pytest.mark.django_db
+def test_board_roles_not_cached_without_shared_cache(settings, user: User, board: Board) -> None:
+    """Тестирует, что с кэшем своего процесса роли не кэшируются между запросами даже при BOARD_ROLES_CACHE_TIMEOUT"""
+
+    settings.BOARD_ROLES_CACHE_TIMEOUT = 60
+    assert get_board_roles(User.objects.get(id=user.id)) == {board.id: BoardParticipant.Role.owner}
+    # изменение без сигналов, как в другом воркере, чей сброс кэша сюда не доходит
+    BoardParticipant.objects.filter(board=board, user=user).update(role=BoardParticipant.Role.reader)
+    assert get_board_roles(User.objects.get(id=user.id)) == {board.id: BoardParticipant.Role.reader}
+
+
+@pytest.mark.django_db
+def test_board_roles_invalidated_after_commit(settings, tmp_path, django_capture_on_commit_callbacks,
+                                              user: User, another_user: User, board: Board) -> None:
+    """Тестирует, что общий кэш ролей сбрасывается только после фиксации транзакции"""
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)}}
+    settings.BOARD_ROLES_CACHE_TIMEOUT = 60
+    assert get_board_roles(User.objects.get(id=another_user.id)) == {}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        BoardParticipant.objects.create(board=board, user=another_user, role=BoardParticipant.Role.reader)
+        # до коммита в кэше прежние роли, новые ещё не видны другим соединениям
+        assert get_board_roles(User.objects.get(id=another_user.id)) == {}
+    assert get_board_roles(User.objects.get(id=another_user.id)) == {board.id: BoardParticipant.Role.reader}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("comments_mode", ["full", "count"])
+def test_goal_list_query_count_is_bounded(api_client: APIClient, user: User, category: GoalCategory,
+                                          comments_mode: str) -> None:
+    """Тестирует, что число запросов списка целей не зависит от числа целей и комментариев"""
+
+    api_client.force_login(user)
+    url = f"/goals/goal/list?limit=50&comments={comments_mode}"
+
+    def count_queries() -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url)
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    goal = Goal.objects.create(title="Goal 0", category=category, user=user)
+    GoalComment.objects.create(text="Comment", goal=goal, user=user)
+    baseline = count_queries()
+
+    for i in range(1, 6):
+        goal = Goal.objects.create(title=f"Goal {i}", category=category, user=user)
+        for _ in range(3):
+            GoalComment.objects.create(text="Comment", goal=goal, user=user)
+
+    assert count_queries() == baseline
+    response = api_client.get(url)
+    first = response.data["results"][0]
+    if comments_mode == "count":
+        assert first["comments_count"] == 3
+        assert "comments" not in first
+    else:
+        assert len(first["comments"]) == 3
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ordering, order_by", [
+    ("-created", ["-created", "-id"]),
+    ("due_date", [F("due_date").asc(nulls_last=True), "id"]),
+    ("-priority", ["-priority", "-id"]),
+    ("title", ["title", "id"]),
+])
+def test_goal_list_cursor_pagination(api_client: APIClient, user: User, category: GoalCategory,
+                                     ordering: str, order_by: list) -> None:
+    """Тестирует курсорную пагинацию: обход вперёд и назад без пропусков и повторов"""
+
+    for i in range(7):
+        Goal.objects.create(title=f"Goal {i % 3}", category=category, user=user, priority=i % 2 + 1,
+                            due_date=None if i % 3 == 0 else f"2030-01-0{i % 4 + 1}")
+    api_client.force_login(user)
+
+    response = api_client.get(f"/goals/goal/list?cursor=&limit=3&ordering={ordering}")
+    assert response.status_code == 200
+    assert "count" not in response.data
+    assert response.data["previous"] is None
+    seen = [goal["id"] for goal in response.data["results"]]
+    while response.data["next"]:
+        response = api_client.get(response.data["next"])
+        seen += [goal["id"] for goal in response.data["results"]]
+
+    assert seen == list(Goal.objects.order_by(*order_by).values_list("id", flat=True))
+
+    back = [goal["id"] for goal in response.data["results"]]
+    while response.data["previous"]:
+        response = api_client.get(response.data["previous"])
+        back = [goal["id"] for goal in response.data["results"]] + back
+    assert back == seen
+
+
+@pytest.mark.django_db
+def test_goal_list_invalid_cursor(api_client: APIClient, user: User, goal: Goal) -> None:
+    """Тестирует ответ на повреждённый курсор"""
+
+    api_client.force_login(user)
+    response = api_client.get("/goals/goal/list?cursor=broken&limit=3")
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_goal_search(api_client: APIClient, user: User, category: GoalCategory) -> None:
+    """Тестирует поиск целей по названию, описанию и комментариям"""
+
+    in_title = Goal.objects.create(title="Buy milk", category=category, user=user)
+    in_description = Goal.objects.create(title="Shopping", description="milk and bread", category=category, user=user)
+    in_comment = Goal.objects.create(title="Breakfast", category=category, user=user)
+    GoalComment.objects.create(text="do not forget milk", goal=in_comment, user=user)
+    Goal.objects.create(title="Unrelated", category=category, user=user)
+
+    api_client.force_login(user)
+    response = api_client.get("/goals/goal/list?search=milk")
+    assert response.status_code == 200
+    assert {goal["id"] for goal in response.data} == {in_title.id, in_description.id, in_comment.id}
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="полнотекстовый поиск есть только в PostgreSQL")
+def test_goal_search_stemming_and_rank(api_client: APIClient, user: User, category: GoalCategory) -> None:
+    """Тестирует морфологию, поиск по префиксу и сортировку по релевантности в PostgreSQL"""
+
+    in_description = Goal.objects.create(title="План", description="Поставить цели на год", category=category,
+                                         user=user)
+    in_title = Goal.objects.create(title="Цели на год", category=category, user=user)
+    Goal.objects.create(title="Running shoes", category=category, user=user)
+
+    api_client.force_login(user)
+    response = api_client.get("/goals/goal/list?search=целями")
+    assert [goal["id"] for goal in response.data] == [in_title.id, in_description.id]
+
+    response = api_client.get("/goals/goal/list?search=runn")
+    assert [goal["title"] for goal in response.data] == ["Running shoes"]
+
+
+@pytest.mark.django_db
+def test_board_update_reconciles_participants(api_client: APIClient, user: User, another_user: User,
+                                              board: Board) -> None:
+    """Тестирует пакетное изменение состава участников доски"""
+
+    removed, added = (User.objects.create_user(username=name, email=f"{name}@example.com", password="pass123")
+                      for name in ("removed", "added"))
+    BoardParticipant.objects.create(board=board, user=another_user, role=BoardParticipant.Role.writer)
+    BoardParticipant.objects.create(board=board, user=removed, role=BoardParticipant.Role.reader)
+
+    api_client.force_login(user)
+    response = api_client.put(
+        f"/goals/board/{board.id}",
+        {"title": "Team", "participants": [
+            {"user": "user2", "role": BoardParticipant.Role.reader},
+            {"user": "added", "role": BoardParticipant.Role.writer},
+        ]},
+        format="json"
+    )
+    assert response.status_code == 200
+    assert dict(board.participants.values_list("user__username", "role")) == {
+        "user1": BoardParticipant.Role.owner,
+        "user2": BoardParticipant.Role.reader,
+        "added": BoardParticipant.Role.writer,
+    }
+    assert {part["user"] for part in response.data["participants"]} == {"user1", "user2", "added"}
+
+
+@pytest.mark.django_db
+def test_board_update_removes_participants_in_constant_queries(api_client: APIClient, user: User,
+                                                               board: Board) -> None:
+    """Тестирует, что удаление участников не делает запрос на каждого и увеличивает версию доски один раз"""
+
+    def remove_members(prefix: str, count: int) -> int:
+        members = [User.objects.create_user(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com",
+                                            password="pass123") for i in range(count)]
+        BoardParticipant.objects.bulk_create(
+            BoardParticipant(board=board, user=member, role=BoardParticipant.Role.reader) for member in members)
+        version = Board.objects.get(id=board.id).version
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.put(f"/goals/board/{board.id}", {"title": board.title, "participants": []},
+                                      format="json")
+        assert response.status_code == 200
+        assert Board.objects.get(id=board.id).version == version + 1
+        return len(context.captured_queries)
+
+    api_client.force_login(user)
+    assert remove_members("many", 20) == remove_members("one", 1)
+    assert list(board.participants.values_list("user_id", flat=True)) == [user.id]
+
+
+@pytest.mark.django_db
+def test_board_version_is_not_exposed(api_client: APIClient, user: User, board: Board) -> None:
+    """Тестирует, что счётчик version не отдаётся в ответах и не меняется через API"""
+
+    api_client.force_login(user)
+    created = api_client.post("/goals/board/create", {"title": "New", "version": 100}, format="json")
+    assert created.status_code == 201
+    assert "version" not in created.data
+    assert Board.objects.get(id=created.data["id"]).version == 0
+
+    version = Board.objects.get(id=board.id).version
+    response = api_client.patch(f"/goals/board/{board.id}", {"title": "Renamed", "version": 0}, format="json")
+    assert response.status_code == 200
+    assert "version" not in response.data
+    assert Board.objects.get(id=board.id).version == version + 1
+    assert all("version" not in item for item in api_client.get("/goals/board/list?limit=10").data["results"])
+
+
+@pytest.mark.django_db
+def test_board_update_unknown_participant(api_client: APIClient, user: User, board: Board) -> None:
+    """Тестирует отказ при указании несуществующего пользователя"""
+
+    api_client.force_login(user)
+    response = api_client.put(
+        f"/goals/board/{board.id}",
+        {"title": "Team", "participants": [{"user": "ghost", "role": BoardParticipant.Role.reader}]},
+        format="json"
+    )
+    assert response.status_code == 400
+    assert not board.participants.filter(user__username="ghost").exists()
+
+
+@pytest.mark.django_db
+def test_goal_bulk_operations(api_client: APIClient, user: User, category: GoalCategory, goal: Goal) -> None:
+    """Тестирует пакетное создание, изменение и архивирование целей"""
+
+    to_archive = Goal.objects.create(title="Old goal", category=category, user=user)
+    api_client.force_login(user)
+    response = api_client.post("/goals/goal/bulk", {"operations": [
+        {"action": "create", "data": {"title": "First", "category": category.id}},
+        {"action": "create", "data": {"title": "Second", "category": category.id, "priority": 4}},
+        {"action": "update", "id": goal.id, "data": {"title": "Renamed", "status": Status.in_progress}},
+        {"action": "archive", "id": to_archive.id},
+        {"action": "create", "data": {"category": category.id}},
+        {"action": "update", "id": 999999, "data": {"title": "Missing"}},
+    ]}, format="json")
+
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.data["results"]]
+    assert statuses == ["ok", "ok", "ok", "ok", "error", "error"]
+    assert "title" in response.data["results"][4]["errors"]
+
+    created = Goal.objects.get(id=response.data["results"][1]["id"])
+    assert (created.title, created.priority, created.user) == ("Second", 4, user)
+    goal.refresh_from_db()
+    assert (goal.title, goal.status) == ("Renamed", Status.in_progress)
+    to_archive.refresh_from_db()
+    assert to_archive.status == Status.archived
+
+
+@pytest.mark.django_db
+def test_goal_bulk_reader_denied(api_client: APIClient, user: User, another_user: User, board: Board,
+                                 category: GoalCategory, goal: Goal) -> None:
+    """Тестирует, что читатель не может пакетно создавать и изменять цели"""
+
+    BoardParticipant.objects.create(board=board, user=another_user, role=BoardParticipant.Role.reader)
+    api_client.force_login(another_user)
+    response = api_client.post("/goals/goal/bulk", {"operations": [
+        {"action": "create", "data": {"title": "Restricted", "category": category.id}},
+        {"action": "archive", "id": goal.id},
+    ]}, format="json")
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.data["results"]] == ["error", "error"]
+    goal.refresh_from_db()
+    assert goal.status == Status.to_do
+    assert not Goal.objects.filter(title="Restricted").exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/goals/goal/list", "/goals/goal_category/list", "/goals/board/list"])
+def test_list_conditional_get(api_client: APIClient, user: User, goal: Goal, url: str) -> None:
+    """Тестирует ETag списков: 304 без запроса списка, пока доски пользователя не менялись"""
+
+    api_client.force_login(user)
+    response = api_client.get(url)
+    etag = response["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+    assert not any("goals_goal\"" in query["sql"] or "goals_goalcategory\"" in query["sql"]
+                   for query in queries.captured_queries)
+
+    assert api_client.get(url + "?limit=1", HTTP_IF_NONE_MATCH=etag).status_code == 200
+    api_client.patch(f"/goals/goal/{goal.id}", {"title": "Renamed"}, format="json")
+    changed = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_goal_list_etag_changes_after_bulk_and_membership(api_client: APIClient, user: User, another_user: User,
+                                                          board: Board, category: GoalCategory, goal: Goal) -> None:
+    """Тестирует смену ETag после пакетных операций и изменения состава досок"""
+
+    api_client.force_login(user)
+    etag = api_client.get("/goals/goal/list")["ETag"]
+    api_client.post("/goals/goal/bulk", {"operations": [{"action": "archive", "id": goal.id}]}, format="json")
+    after_bulk = api_client.get("/goals/goal/list", HTTP_IF_NONE_MATCH=etag)
+    assert after_bulk.status_code == 200
+
+    other_board = Board.objects.create(title="Other")
+    BoardParticipant.objects.create(board=other_board, user=user, role=BoardParticipant.Role.reader)
+    assert api_client.get("/goals/goal/list", HTTP_IF_NONE_MATCH=after_bulk["ETag"]).status_code == 200
+
+    api_client.force_login(another_user)
+    assert api_client.get("/goals/goal/list")["ETag"] != after_bulk["ETag"]
+
+
+@pytest.mark.django_db
+def test_goal_list_etag_changes_for_previous_board(settings, api_client: APIClient, user: User, another_user: User,
+                                                    board: Board, category: GoalCategory, goal: Goal) -> None:
+    """Тестирует, что перенос цели или категории в другую доску меняет ETag и кеш у читателей прежней доски"""
+
+    settings.LIST_CACHE_TIMEOUT = 300
+    BoardParticipant.objects.create(board=board, user=another_user, role=BoardParticipant.Role.reader)
+    other_board = Board.objects.create(title="Other")
+    BoardParticipant.objects.create(board=other_board, user=user, role=BoardParticipant.Role.owner)
+    other_category = GoalCategory.objects.create(title="Other category", board=other_board, user=user)
+    viewer = APIClient()
+    viewer.force_login(another_user)
+    etag = viewer.get("/goals/goal/list")["ETag"]
+
+    api_client.force_login(user)
+    api_client.patch(f"/goals/goal/{goal.id}", {"category": other_category.id}, format="json")
+    moved = viewer.get("/goals/goal/list", HTTP_IF_NONE_MATCH=etag)
+    assert moved.status_code == 200
+    assert moved.data == []
+
+    Goal.objects.create(title="Second", category=category, user=user)
+    etag = viewer.get("/goals/goal/list")["ETag"]
+    category.refresh_from_db()
+    category.board = other_board
+    category.save()
+    moved = viewer.get("/goals/goal/list", HTTP_IF_NONE_MATCH=etag)
+    assert moved.status_code == 200
+    assert moved.data == []
+
+
+@pytest.mark.django_db
+def test_goal_board_follows_category(api_client: APIClient, user: User, board: Board, category: GoalCategory,
+                                     goal: Goal, comment: GoalComment) -> None:
+    """Тестирует, что доска цели и её комментариев следует за категорией при переносе"""
+
+    assert goal.board_id == comment.board_id == board.id
+    other_board = Board.objects.create(title="Other")
+    BoardParticipant.objects.create(board=other_board, user=user, role=BoardParticipant.Role.owner)
+    other_category = GoalCategory.objects.create(title="Other category", board=other_board, user=user)
+
+    api_client.force_login(user)
+    response = api_client.patch(f"/goals/goal/{goal.id}", {"category": other_category.id}, format="json")
+    assert response.status_code == 200
+    assert Goal.objects.get(id=goal.id).board_id == other_board.id
+    assert GoalComment.objects.get(id=comment.id).board_id == other_board.id
+
+    api_client.post("/goals/goal/bulk", {"operations": [
+        {"action": "update", "id": goal.id, "data": {"category": category.id}}]}, format="json")
+    assert Goal.objects.get(id=goal.id).board_id == board.id
+    assert GoalComment.objects.get(id=comment.id).board_id == board.id
+
+    category.board = other_board
+    category.save()
+    assert Goal.objects.get(id=goal.id).board_id == other_board.id
+    assert GoalComment.objects.get(id=comment.id).board_id == other_board.id
+
+
+@pytest.mark.django_db
+def test_comment_list_filters_by_board_without_joins(api_client: APIClient, user: User, another_user: User,
+                                                     comment: GoalComment) -> None:
+    """Тестирует, что список комментариев фильтруется по board_id без DISTINCT и join через доску"""
+
+    api_client.force_login(user)
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get("/goals/goal_comment/list")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.data] == [comment.id]
+    comment_sql = [query["sql"] for query in queries.captured_queries if "goals_goalcomment" in query["sql"]]
+    assert comment_sql and not any("DISTINCT" in sql or "goals_board" in sql for sql in comment_sql)
+
+    api_client.force_login(another_user)
+    assert api_client.get("/goals/goal_comment/list").data == []
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="проверяются планы запросов PostgreSQL")
+@pytest.mark.parametrize("index, make_queryset", [
+    ("goal_category_status_idx", lambda user, board, category: Goal.objects.filter(
+        category_id__in=[category.id], status=Status.to_do).order_by("-created")),
+    ("goal_board_status_idx", lambda user, board, category: Goal.objects.filter(
+        board_id__in=[board.id], status=Status.to_do).order_by("-created")),
+    ("goal_user_active_idx", lambda user, board, category: Goal.objects.filter(
+        user_id=user.id, status__in=[Status.to_do, Status.in_progress]).order_by("-created", "-id")),
+    ("category_board_active_idx", lambda user, board, category: GoalCategory.objects.filter(
+        board_id__in=[board.id], is_deleted=False).order_by("title")),
+    ("participant_user_board_idx", lambda user, board, category: BoardParticipant.objects.filter(
+        user=user, board__is_deleted=False).values_list("board_id", "role")),
+    ("comment_board_created_idx", lambda user, board, category: GoalComment.objects.filter(
+        board_id__in=[board.id]).order_by("-created", "-id")),
+])
+def test_query_uses_index(user: User, board: Board, category: GoalCategory, comment: GoalComment,
+                          index: str, make_queryset) -> None:
+    """Тестирует, что основные фильтры списков, бота и ролей обслуживаются своими индексами"""
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    plan: str = make_queryset(user, board, category).explain()
+    assert index in plan
+
+
+@pytest.mark.django_db
+def test_migrations_match_models() -> None:
+    """Тестирует, что все изменения моделей закоммичены в миграциях: при деплое makemigrations не запускается"""
+
+    call_command("makemigrations", "--check", "--dry-run", verbosity=0)
+
+
+@pytest.mark.django_db
+def test_board_delete_archives_goals_in_batches(api_client: APIClient, user: User, another_user: User,
+                                               board: Board, category: GoalCategory) -> None:
+    """Тестирует, что доска скрывается сразу, а её цели архивируются фоновой задачей порциями"""
+
+    Goal.objects.bulk_create(
+        Goal(title=f"Goal {i}", category=category, board=board, user=user) for i in range(5))
+    api_client.force_login(user)
+    response = api_client.delete(f"/goals/board/{board.id}")
+    assert response.status_code == 202
+    assert response.data["status"] == ArchiveJob.Status.pending
+    assert response["Location"].endswith(f"/goals/job/{response.data['id']}")
+    assert api_client.get("/goals/goal/list").data == []
+    assert not Goal.objects.filter(status=Status.archived).exists()
+    category.refresh_from_db()
+    assert category.is_deleted is True
+
+    worker = ArchiveWorker(batch_size=2)
+    steps = 0
+    while worker.run_once():
+        steps += 1
+    assert steps == 3
+    assert Goal.objects.filter(board=board).exclude(status=Status.archived).count() == 0
+    category.refresh_from_db()
+    assert category.is_deleted is True
+
+    job = api_client.get(response["Location"])
+    assert job.status_code == 200
+    assert job.data["status"] == ArchiveJob.Status.done
+    assert job.data["archived"] == 5
+    assert job.data["finished"] is not None
+
+    api_client.force_login(another_user)
+    assert api_client.get(response["Location"]).status_code == 404
+
+
+@pytest.mark.django_db
+def test_archive_job_retries_failed_step(user: User, board: Board, goal: Goal, monkeypatch) -> None:
+    """Тестирует повтор упавшего шага задачи и пометку задачи ошибочной после max_attempts"""
+
+    job = ArchiveJob.objects.create(user=user, board=board)
+    worker = ArchiveWorker(max_attempts=2, backoff=0)
+
+    def broken_step(job: ArchiveJob) -> None:
+        raise RuntimeError("db is gone")
+
+    monkeypatch.setattr(worker, "_step", broken_step)
+    assert worker.run_once() and worker.run_once()
+    job.refresh_from_db()
+    assert job.status == ArchiveJob.Status.failed
+    assert job.attempts == 2
+    assert job.last_error == "db is gone"
+    assert worker.run_once() is False
+
+
+def test_benchmark_covers_all_routes() -> None:
+    """Тестирует, что замер покрывает все маршруты goals и core"""
+
+    from core.urls import urlpatterns as core_urls
+    from goals.urls import urlpatterns as goals_urls
+
+    assert {pattern.name for pattern in [*core_urls, *goals_urls]} == {route.name for route in ROUTES}
+
+
+@pytest.mark.django_db
+def test_benchmark_query_budgets(settings) -> None:
+    """Тестирует, что ни один маршрут не превышает лимит SQL-запросов на синтетических данных"""
+
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    report = run_benchmark(SyntheticConfig(users=4, boards=2, participants=2, categories=2, goals=30), repeat=2)
+
+    assert len(report["routes"]) == len(ROUTES)
+    assert [result["label"] for result in report["routes"] if result["over_budget"] or result["failed"]] == []
+
+
+@pytest.mark.django_db
+def test_benchmark_repeats_skip_list_cache(settings) -> None:
+    """Тестирует, что повторы замера списка выполняют запрос целей, а не берут данные из кеша списков"""
+
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    route = next(route for route in ROUTES if route.name == "goal_list")
+    with CaptureQueriesContext(connection) as queries:
+        run_benchmark(SyntheticConfig(users=2, boards=1, participants=1, categories=1, goals=5), repeat=3,
+                      routes=[route])
+    assert sum(query["sql"].startswith("SELECT") and 'FROM "goals_goal"' in query["sql"]
+               and "COUNT(" not in query["sql"] for query in queries.captured_queries) == 3
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic_and_skewed() -> None:
+    """Тестирует, что seed с одинаковыми параметрами даёт одинаковые данные с перекосом размеров досок"""
+
+    def snapshot(prefix: str, *args) -> list:
+        call_command("seed", *args, users=5, boards=10, goals=300, comments=2, batch_size=64, prefix=prefix,
+                     stdout=io.StringIO())
+        boards = {board_id: rank for rank, board_id in enumerate(
+            Board.objects.filter(participants__user__username=f"{prefix}_0").order_by("id").values_list("id", flat=True))}
+        return [(title, status, priority, due_date, boards[board_id])
+                for title, status, priority, due_date, board_id in
+                Goal.objects.filter(user__username__startswith=f"{prefix}_").order_by("id")
+                .values_list("title", "status", "priority", "due_date", "board_id")]
+
+    first = snapshot("first")
+    assert len(first) == 300
+    assert first == snapshot("second")
+    # дедлайны отсчитываются от заданной даты, а не от дня запуска
+    shifted = snapshot("shifted", "--reference-date", "2026-01-11")
+    assert [due_date for *_, due_date, _ in shifted] == [
+        due_date and due_date + timedelta(days=10) for *_, due_date, _ in first]
+
+    sizes = sorted(Counter(rank for *_, rank in first).values(), reverse=True)
+    assert sizes[0] > 3 * sizes[-1]
+    assert {status for _, status, *_ in first} == set(Status.values)
+    assert 400 < GoalComment.objects.filter(goal__user__username__startswith="first_").count() < 800
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("sync_view, async_view, query", [
+    (GoalListView, AsyncGoalListView, ""),
+    (GoalListView, AsyncGoalListView, "?limit=2&offset=1"),
+    (GoalListView, AsyncGoalListView, "?cursor=&limit=2"),
+    (GoalListView, AsyncGoalListView, "?comments=count&ordering=title&category={category}"),
+    (GoalCommentListView, AsyncGoalCommentListView, "?limit=2"),
+    (BoardListView, AsyncBoardListView, "?limit=10"),
+])
+def test_async_list_views_match_sync(settings, user: User, category: GoalCategory, sync_view, async_view,
+                                     query: str) -> None:
+    """Тестирует, что async-списки отдают те же данные и ETag, что синхронные, не обращаясь к БД из цикла событий"""
+
+    settings.LIST_CACHE_TIMEOUT = 0
+    for i in range(3):
+        goal = Goal.objects.create(title=f"Цель {i}", category=category, user=user)
+        GoalComment.objects.create(text=f"Комментарий {i}", goal=goal, user=user)
+    factory = APIRequestFactory()
+
+    def call(view, **headers):
+        request = factory.get(f"/goals/list{query.format(category=category.pk)}", **headers)
+        # свежий пользователь: роли в досках запоминаются на объекте
+        force_authenticate(request, user=User.objects.get(pk=user.pk))
+        handler = view.as_view()
+        if iscoroutinefunction(handler):
+            return async_to_sync(handler)(request).render()
+        return handler(request).render()
+
+    expected = call(sync_view)
+    response = call(async_view)
+    assert response.status_code == 200
+    assert response.data == expected.data
+    assert response.get("ETag") == expected.get("ETag")
+    if response.get("ETag"):
+        assert call(async_view, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+
+def test_async_views_are_coroutines() -> None:
+    """Тестирует, что Django вызывает async-списки как корутины, а синхронные — в потоке"""
+
+    assert iscoroutinefunction(AsyncGoalListView.as_view())
+    assert iscoroutinefunction(AsyncGoalCommentListView.as_view())
+    assert iscoroutinefunction(AsyncBoardListView.as_view())
+    assert not iscoroutinefunction(GoalListView.as_view())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest(live_server, user: User, category: GoalCategory) -> None:
+    """Тестирует нагрузочный замер: запрос с токеном, ответы быстрых клиентов и завершённые медленные запросы"""
+
+    Goal.objects.create(title="Цель", category=category, user=user)
+    config = LoadConfig(url=f"{live_server.url}/goals/goal/list?limit=5", token=str(AccessToken.for_user(user)),
+                        slow_clients=2, fast_clients=1, slow_interval=0.001, duration=1)
+
+    request = build_request(config)
+    assert request.startswith(b"GET /goals/goal/list?limit=5 HTTP/1.1\r\n")
+    assert f"Authorization: Bearer {config.token}".encode() in request
+    assert request.endswith(b"\r\n\r\n")
+
+    report = async_to_sync(run_load)(config)
+    assert report["ok"] == report["requests"] > 0
+    assert set(report["statuses"]) == {"200"}
+    assert report["p50_ms"] <= report["p95_ms"] <= report["max_ms"]
+    assert report["slow_completed"] > 0
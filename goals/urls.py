@@ -1,20 +1,29 @@
+from django.conf import settings
 from django.urls import path
 from goals import views
 
+# при ASYNC_VIEWS списки целей, комментариев и досок работают на async ORM (для запуска под ASGI)
+goal_list_view = views.AsyncGoalListView if settings.ASYNC_VIEWS else views.GoalListView
+goal_comment_list_view = views.AsyncGoalCommentListView if settings.ASYNC_VIEWS else views.GoalCommentListView
+board_list_view = views.AsyncBoardListView if settings.ASYNC_VIEWS else views.BoardListView
+
 urlpatterns = [
     path("goal_category/create", views.GoalCategoryCreateView.as_view(), name="goal_category_create"),
     path("goal_category/list", views.GoalCategoryListView.as_view(), name="goal_category_list"),
     path("goal_category/<int:pk>", views.GoalCategoryView.as_view(), name="goal_category_detail"),
 
     path("goal/create", views.GoalCreateView.as_view(), name="goal_create"),
-    path("goal/list", views.GoalListView.as_view(), name="goal_list"),
+    path("goal/list", goal_list_view.as_view(), name="goal_list"),
+    path("goal/bulk", views.GoalBulkView.as_view(), name="goal_bulk"),
     path("goal/<int:pk>", views.GoalDetailView.as_view(), name="goal_detail"),
 
     path("goal_comment/create", views.GoalCommentCreateView.as_view(), name="goal_comment_create"),
-    path("goal_comment/list", views.GoalCommentListView.as_view(), name="goal_comment_list"),
+    path("goal_comment/list", goal_comment_list_view.as_view(), name="goal_comment_list"),
     path("goal_comment/<int:pk>", views.GoalCommentDetailView.as_view(), name="goal_comment_detail"),
 
     path("board/create", views.BoardCreateView.as_view(), name="board_create"),
-    path("board/list", views.BoardListView.as_view(), name="board_list"),
+    path("board/list", board_list_view.as_view(), name="board_list"),
     path("board/<int:pk>", views.BoardView.as_view(), name="board_detail"),
+
+    path("job/<int:pk>", views.ArchiveJobView.as_view(), name="archive_job_detail"),
 ]
\ No newline at end of file
@@ -1,30 +1,63 @@
-from django.db.models import QuerySet
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, QuerySet, Subquery
+from django.urls import reverse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import permissions, filters
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework import permissions, filters, status
 from rest_framework.generics import (CreateAPIView,
+                                     GenericAPIView,
                                      ListAPIView,
+                                     RetrieveAPIView,
                                      RetrieveUpdateDestroyAPIView)
+from rest_framework.request import Request
+from rest_framework.response import Response
 from goals.serializers import (GoalCategorySerializer,
                                GoalSerializer,
+                               GoalListSerializer,
+                               GoalBulkSerializer,
+                               GoalBulkItemSerializer,
                                GoalCommentSerializer,
                                GoalCommentCreateSerializer,
                                BoardSerializer,
                                BoardListSerializer,
-                               BoardCreateSerializer)
-from goals.models import Board, BoardParticipant, Goal, GoalCategory, GoalComment, Status
-from goals.permissions import BoardPermission
-from goals.filters import GoalFilter, GoalCommentFilter, GoalCategoryFilter
+                               BoardCreateSerializer,
+                               ArchiveJobSerializer)
+from goals.caching import ConditionalListMixin, bump_board_versions
+from goals.generics import AsyncListAPIView
+from goals.membership import get_board_roles
+from goals.jobs import enqueue_archive
+from goals.models import ArchiveJob, Board, Goal, GoalCategory, GoalComment, Status
+from goals.pagination import KeysetPagination
+from goals.permissions import BoardPermission, has_board_permissions
+from goals.filters import GoalFilter, GoalCommentFilter, GoalCategoryFilter, RankedOrderingFilter
 from core.models import User
 
 
+def with_comments(queryset: QuerySet) -> QuerySet:
+    """Подгружает комментарии целей вместе с авторами одним дополнительным запросом"""
+
+    return queryset.prefetch_related(
+        Prefetch('comments', queryset=GoalComment.objects.select_related('user')))
+
+
 def get_user_board_ids(user: User) -> list:
     """Возвращает ID досок, где пользователь является участником и доска не удалена"""
 
-    return list(BoardParticipant.objects.filter(
-        user=user,
-        board__is_deleted=False
-    ).values_list('board_id', flat=True))
+    return list(get_board_roles(user))
+
+
+class ArchiveOnDestroyMixin:
+    """DELETE сразу скрывает объект флагом is_deleted, а цели архивирует фоновая задача.
+
+    Ответ 202 содержит задачу, её состояние доступно по ссылке из заголовка Location.
+    """
+
+    def destroy(self, request: Request, *args, **kwargs) -> Response:
+        job: ArchiveJob = self.perform_destroy(self.get_object())
+        return Response(
+            ArchiveJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': request.build_absolute_uri(reverse('archive_job_detail', args=[job.id]))})
 
 
 class GoalCategoryCreateView(CreateAPIView):
@@ -32,10 +65,10 @@ class GoalCategoryCreateView(CreateAPIView):
     serializer_class = GoalCategorySerializer
 
 
-class GoalCategoryListView(ListAPIView):
+class GoalCategoryListView(ConditionalListMixin, ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCategorySerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
     filterset_class = GoalCategoryFilter
     ordering_fields = ["title", "created"]
@@ -49,17 +82,18 @@ class GoalCategoryListView(ListAPIView):
             is_deleted=False)
 
 
-class GoalCategoryView(RetrieveUpdateDestroyAPIView):
+class GoalCategoryView(ArchiveOnDestroyMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = GoalCategorySerializer
     permission_classes = [permissions.IsAuthenticated, BoardPermission]
 
     def get_queryset(self) -> QuerySet:
         return GoalCategory.objects.filter(is_deleted=False)
 
-    def perform_destroy(self, instance: GoalCategory) -> None:
-        Goal.objects.filter(category=instance).update(status=Status.archived)
-        instance.is_deleted = True
-        instance.save(update_fields=['is_deleted'])
+    def perform_destroy(self, instance: GoalCategory) -> ArchiveJob:
+        with transaction.atomic():
+            instance.is_deleted = True
+            instance.save(update_fields=['is_deleted'])
+            return enqueue_archive(self.request.user, instance.board, instance)
 
 
 class GoalCreateView(CreateAPIView):
@@ -67,37 +101,43 @@ class GoalCreateView(CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class GoalListView(ListAPIView):
+class GoalListView(ConditionalListMixin, ListAPIView):
     serializer_class = GoalSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = LimitOffsetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, RankedOrderingFilter]
     filterset_class = GoalFilter
     ordering_fields = ["title", "created", "due_date", "priority"]
     ordering = ["-created"]
-    search_fields = ["title", "description"]
+
+    def comments_mode(self) -> str:
+        """Режим комментариев в списке: full — полные комментарии, count — только их количество"""
+
+        return 'count' if self.request.query_params.get('comments') == 'count' else 'full'
+
+    def get_serializer_class(self):
+        if self.comments_mode() == 'count':
+            return GoalListSerializer
+        return GoalSerializer
 
     def get_queryset(self) -> QuerySet:
-        user: User = self.request.user
-        category_filter = self.request.GET.get('category__in') or self.request.GET.get('category')
+        queryset: QuerySet = Goal.objects.filter(
+            board_id__in=get_user_board_ids(self.request.user),
+            category__is_deleted=False
+        ).select_related('user', 'category')
 
+        category_filter = self.request.GET.get('category__in') or self.request.GET.get('category')
         if category_filter:
-            try:
-                category_ids = [int(cid) for cid in category_filter.split(',') if cid.isdigit()]
-                queryset = Goal.objects.filter(category_id__in=category_ids)
-            except ValueError:
-                queryset = Goal.objects.none()
-        else:
-            board_ids: list = get_user_board_ids(user)
-            category_ids = GoalCategory.objects.filter(
-                board_id__in=board_ids,
-                is_deleted=False
-            ).values_list('id', flat=True)
-            queryset: QuerySet = Goal.objects.filter(category_id__in=category_ids)
-
-        return queryset.filter(category__is_deleted=False,
-                               category__board__is_deleted=False
-                               ).select_related('user', 'category', 'category__board')
+            category_ids = [int(cid) for cid in category_filter.split(',') if cid.isdigit()]
+            queryset = queryset.filter(category_id__in=category_ids)
+
+        if self.comments_mode() == 'count':
+            return queryset.annotate(comments_count=Count('comments'))
+        return with_comments(queryset)
+
+
+class AsyncGoalListView(GoalListView, AsyncListAPIView):
+    """GoalListView на async ORM, подключается вместо него при ASYNC_VIEWS"""
 
 
 class GoalDetailView(RetrieveUpdateDestroyAPIView):
@@ -105,13 +145,123 @@ class GoalDetailView(RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, BoardPermission]
 
     def get_queryset(self) -> QuerySet:
-        return Goal.objects.all()
+        return with_comments(Goal.objects.all())
 
     def perform_destroy(self, instance):
         instance.status = Status.archived
         instance.save(update_fields=['status'])
 
 
+class GoalBulkView(GenericAPIView):
+    """Пакетное создание, изменение и архивирование целей в одной транзакции.
+
+    Каждая операция проверяется правилами GoalSerializer; невалидные операции
+    пропускаются и возвращаются с ошибками, остальные записываются через
+    bulk_create/bulk_update.
+    """
+
+    serializer_class = GoalBulkSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations: list = serializer.validated_data['operations']
+
+        goals: dict = self._load_goals(operations)
+        context: dict = {**self.get_serializer_context(), 'categories': self._load_categories(operations)}
+
+        results: list = []
+        created: list = []
+        changed: dict = {}
+        changed_fields: set = set()
+        touched_boards: set = set()
+        moved: list = []
+        for index, operation in enumerate(operations):
+            action: str = operation['action']
+            result: dict = {'index': index, 'action': action, 'status': 'ok'}
+            results.append(result)
+
+            if action == 'create':
+                item = GoalBulkItemSerializer(data=operation['data'], context=context)
+                if not item.is_valid():
+                    result.update(status='error', errors=item.errors)
+                    continue
+                goal = Goal(**item.validated_data)
+                goal.board_id = goal.category.board_id
+                created.append((result, goal))
+                touched_boards.add(goal.board_id)
+                continue
+
+            goal: Goal | None = goals.get(operation['id'])
+            result['id'] = operation['id']
+            if goal is None:
+                result.update(status='error', errors={'id': 'Цель не найдена'})
+                continue
+            if not has_board_permissions(request.user, goal.board_id, BoardPermission.WRITE_ROLES):
+                result.update(status='error', errors={'detail': 'Недостаточно прав для изменения цели'})
+                continue
+
+            touched_boards.add(goal.board_id)
+            if action == 'archive':
+                goal.status = Status.archived
+                changed_fields.add('status')
+            else:
+                item = GoalBulkItemSerializer(goal, data=operation['data'], partial=True, context=context)
+                if not item.is_valid():
+                    result.update(status='error', errors=item.errors)
+                    continue
+                for attr, value in item.validated_data.items():
+                    setattr(goal, attr, value)
+                    changed_fields.add(attr)
+                if 'category' in item.validated_data and goal.board_id != goal.category.board_id:
+                    goal.board_id = goal.category.board_id
+                    changed_fields.add('board')
+                    moved.append(goal.id)
+                touched_boards.add(goal.board_id)
+            changed[goal.id] = goal
+
+        with transaction.atomic():
+            Goal.objects.bulk_create([goal for _, goal in created])
+            if changed:
+                now = timezone.now()
+                for goal in changed.values():
+                    goal.updated = now
+                Goal.objects.bulk_update(list(changed.values()), [*changed_fields, 'updated'])
+            if moved:
+                GoalComment.objects.filter(goal_id__in=moved).update(
+                    board_id=Subquery(Goal.objects.filter(id=OuterRef('goal_id')).values('board_id')))
+            # bulk_create/bulk_update не отправляют сигналы, версии досок обновляются явно
+            bump_board_versions(touched_boards)
+
+        for result, goal in created:
+            result['id'] = goal.id
+        return Response({'results': results})
+
+    def _load_goals(self, operations: list) -> dict:
+        """Загружает цели из операций изменения одним запросом, только из досок пользователя"""
+
+        ids: set = {operation['id'] for operation in operations if operation['action'] != 'create'}
+        if not ids:
+            return {}
+        return Goal.objects.filter(
+            board_id__in=get_user_board_ids(self.request.user)
+        ).in_bulk(ids)
+
+    def _load_categories(self, operations: list) -> dict:
+        """Загружает упомянутые в операциях категории вместе с досками одним запросом"""
+
+        ids: set = set()
+        for operation in operations:
+            try:
+                ids.add(int(operation['data']['category']))
+            except (KeyError, TypeError, ValueError):
+                continue
+        if not ids:
+            return {}
+        return GoalCategory.objects.select_related('board').in_bulk(ids)
+
+
 class GoalCommentCreateView(CreateAPIView):
     serializer_class = GoalCommentCreateSerializer
     permission_classes = [permissions.IsAuthenticated, BoardPermission]
@@ -120,21 +270,21 @@ class GoalCommentCreateView(CreateAPIView):
 class GoalCommentListView(ListAPIView):
     serializer_class = GoalCommentSerializer
     permission_classes = [permissions.IsAuthenticated, BoardPermission]
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = GoalCommentFilter
     ordering_fields = ["created", "updated"]
     ordering = ["-created"]
 
     def get_queryset(self) -> QuerySet:
-        user: User = self.request.user
         return GoalComment.objects.filter(
-            goal__category__board__participants__user=user,
-            goal__category__board__is_deleted=False,
+            board_id__in=get_user_board_ids(self.request.user),
             goal__category__is_deleted=False
-        ).select_related(
-            'user', 'goal', 'goal__category'
-        ).distinct()
+        ).select_related('user')
+
+
+class AsyncGoalCommentListView(GoalCommentListView, AsyncListAPIView):
+    """GoalCommentListView на async ORM, подключается вместо него при ASYNC_VIEWS"""
 
 
 class GoalCommentDetailView(RetrieveUpdateDestroyAPIView):
@@ -142,44 +292,55 @@ class GoalCommentDetailView(RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, BoardPermission]
 
     def get_queryset(self) -> QuerySet:
-        user: User = self.request.user
         return GoalComment.objects.filter(
-            goal__category__board__participants__user=user,
-            goal__category__board__is_deleted=False,
+            board_id__in=get_user_board_ids(self.request.user),
             goal__category__is_deleted=False
-        ).select_related('user', 'goal').distinct()
+        ).select_related('user')
 
 
-class BoardView(RetrieveUpdateDestroyAPIView):
+class BoardView(ArchiveOnDestroyMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = BoardSerializer
     permission_classes = [permissions.IsAuthenticated, BoardPermission]
 
     def get_queryset(self) -> QuerySet:
         return Board.objects.filter(is_deleted=False)
 
-    def perform_destroy(self, instance: Board) -> Board:
-        instance.is_deleted = True
-        instance.save(update_fields=['is_deleted'])
-        instance.categories.update(is_deleted=True)
-        Goal.objects.filter(category__board=instance).update(status=Status.archived)
-        return instance
+    def perform_destroy(self, instance: Board) -> ArchiveJob:
+        with transaction.atomic():
+            instance.is_deleted = True
+            instance.save(update_fields=['is_deleted'])
+            # категории скрываются сразу одним запросом, задача только архивирует цели
+            GoalCategory.objects.filter(board=instance).update(is_deleted=True)
+            return enqueue_archive(self.request.user, instance)
 
 
-class BoardListView(ListAPIView):
+class BoardListView(ConditionalListMixin, ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BoardListSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     ordering_fields = ['title', 'created']
     ordering = ['title']
 
     def get_queryset(self) -> QuerySet:
-        return Board.objects.filter(
-            participants__user=self.request.user,
-            is_deleted=False
-        ).distinct()
+        board_ids: list = get_user_board_ids(self.request.user)
+        return Board.objects.filter(id__in=board_ids)
+
+
+class AsyncBoardListView(BoardListView, AsyncListAPIView):
+    """BoardListView на async ORM, подключается вместо него при ASYNC_VIEWS"""
 
 
 class BoardCreateView(CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BoardCreateSerializer
+
+
+class ArchiveJobView(RetrieveAPIView):
+    """Состояние фоновой задачи архивирования, поставленной пользователем"""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ArchiveJobSerializer
+
+    def get_queryset(self) -> QuerySet:
+        return ArchiveJob.objects.filter(user=self.request.user)
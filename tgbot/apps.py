@@ -6,3 +6,5 @@ class TgbotConfig(AppConfig):
     name = "tgbot"
     verbose_name = 'Telegram Бот'
 
+    def ready(self) -> None:
+        from tgbot import signals  # noqa: F401
@@ -0,0 +1,62 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Left
+from core.caches import is_shared_cache
+from goals.models import Goal, Status
+
+GOALS_PAGE_SIZE = 10  # 10 целей с превью описания укладываются в лимит Telegram 4096 символов
+DESCRIPTION_PREVIEW = 50
+
+
+def _version_key(user_id: int) -> str:
+    return f"tgbot:goals:version:{user_id}"
+
+
+def invalidate_goal_pages(user_id: int) -> None:
+    """Делает устаревшими все закешированные страницы /goals пользователя"""
+
+    cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def render_goals_page(user_id: int, page: int) -> str:
+    """Возвращает страницу активных целей пользователя из кеша или строит её одним запросом.
+
+    Кеш сбрасывается сигналами сохранения и удаления целей; массовые update()
+    сигналов не вызывают, поэтому страница живёт не дольше TGBOT_GOALS_CACHE_TTL.
+    Цели меняет и API в других процессах, поэтому с кешем своего процесса страницы не кешируются.
+    """
+
+    if not is_shared_cache():
+        return _render_goals_page(user_id, page)
+
+    key: str = f"tgbot:goals:{user_id}:{cache.get(_version_key(user_id), 0)}:{page}"
+    text: str | None = cache.get(key)
+    if text is None:
+        text = _render_goals_page(user_id, page)
+        cache.set(key, text, settings.TGBOT_GOALS_CACHE_TTL)
+    return text
+
+
+def _render_goals_page(user_id: int, page: int) -> str:
+    offset: int = (page - 1) * GOALS_PAGE_SIZE
+    goals: list = list(
+        Goal.objects.filter(user_id=user_id, status__in=[Status.to_do, Status.in_progress], board__is_deleted=False)
+        .select_related('category')
+        .only('title', 'due_date', 'category__title')
+        .annotate(description_preview=Left('description', DESCRIPTION_PREVIEW))
+        .order_by('-created', '-id')[offset:offset + GOALS_PAGE_SIZE + 1]
+    )
+
+    if not goals:
+        return "У вас нет активных целей." if page == 1 else "На этой странице целей нет."
+
+    lines = [f"Ваши цели (страница {page}):"]
+    for goal in goals[:GOALS_PAGE_SIZE]:
+        description = f"{goal.description_preview}..." if goal.description_preview else ""
+        deadline = f"{goal.due_date.strftime('%d.%m.%Y')}" if goal.due_date else ""
+        category_title = goal.category.title if goal.category else "Без категории"
+        lines.append(f"**{goal.title}**\n{description}\nдо: {deadline}\nкатегория: {category_title}")
+    if len(goals) > GOALS_PAGE_SIZE:
+        lines.append(f"Следующая страница: /goals {page + 1}")
+    return "\n\n".join(lines)
@@ -0,0 +1,178 @@
+import time
+from datetime import datetime
+from typing import Callable
+from core.models import User
+from goals.models import Goal, GoalCategory, BoardParticipant, Status
+from .goal_pages import render_goals_page
+from .metrics import COMMAND_DURATION, UPDATE_LAG, UPDATES, command_label
+from .models import TgUser
+from .outbox import enqueue_message, reply_key
+from .state import StateStore, get_state_store
+from .tg.dc import UpdateObj
+
+
+def reply_to_update(update: UpdateObj, process: Callable[..., str], source: str = 'polling') -> None:
+    """Обрабатывает текстовое сообщение из обновления и ставит ответ в очередь отправки.
+
+    source — способ получения обновления (polling или webhook) для метрик.
+    """
+
+    tg_message = update.message
+    sender = tg_message.from_
+    text: str = tg_message.text.strip()
+    UPDATE_LAG.observe(max(0.0, time.time() - tg_message.date), source=source)
+    start = time.perf_counter()
+    try:
+        reply: str = process(
+            chat_id=tg_message.chat.id,
+            username=(sender.username if sender else None) or "",
+            text=text
+        )
+        enqueue_message(tg_message.chat.id, reply, reply_key(update.update_id))
+    except Exception:
+        UPDATES.inc(source=source, outcome='error')
+        raise
+    finally:
+        COMMAND_DURATION.observe(time.perf_counter() - start, command=command_label(text))
+    UPDATES.inc(source=source, outcome='ok')
+
+
+class MessageHandler:
+    """Диалог бота с пользователем, общий для long polling и вебхука"""
+
+    def __init__(self, states: StateStore | None = None) -> None:
+        self.states: StateStore = states or get_state_store()  # ключ — chat_id
+
+    def process(self, chat_id: int, username: str, text: str) -> str:
+        """Основной обработчик входящего сообщения от пользователя"""
+
+        if text.lower() == '/cancel':
+            self.states.delete(chat_id)
+            return "Действие отменено!"
+
+        tg_user, _ = TgUser.objects.get_or_create(
+            telegram_chat_id=chat_id,
+            defaults={'username': username}
+        )
+
+        if not tg_user.user:
+            if not tg_user.verification_code:
+                tg_user.generate_verification_code()
+            return (
+                f"Код верификации: {tg_user.verification_code}\n"
+                "Введите его в личном кабинете на сайте, чтобы привязать аккаунт."
+            )
+
+        command, _, argument = text.lower().partition(' ')
+        if command == '/goals':
+            return self._get_goals(tg_user.user, argument.strip())
+        if command == '/create':
+            return self._initiate_goal_creation(chat_id, tg_user.user)
+
+        state: dict | None = self.states.get(chat_id)
+        if state:
+            return self._handle_goal_creation_step(chat_id, tg_user, text, state)
+
+        return (
+            "Доступные команды:\n\n"
+            "/goals [N] — показать активные цели, страница N\n"
+            "/create — создать новую цель\n"
+            "/cancel — отменить текущее действие"
+        )
+
+    def _get_goals(self, user: User, argument: str) -> str:
+        """Возвращает страницу активных целей пользователя: /goals или /goals N"""
+
+        if not argument:
+            return render_goals_page(user.id, 1)
+        if not argument.isdigit() or int(argument) < 1:
+            return "Номер страницы должен быть положительным числом: /goals 2"
+        return render_goals_page(user.id, int(argument))
+
+    def _initiate_goal_creation(self, chat_id: int, user: User) -> str:
+        """Начинает процесс создания цели: проверяет наличие категорий и предлагает выбор."""
+
+        participant_board_ids = BoardParticipant.objects.filter(user=user).values_list('board_id', flat=True)
+        all_categories = list(GoalCategory.objects.filter(
+            board_id__in=participant_board_ids,
+            is_deleted=False,
+            board__is_deleted=False
+        ))
+
+        if not all_categories:
+            return "У вас нет категорий. Создайте категорию на сайте."
+
+        categories = "\n".join(f"{i + 1}. {cat.title}" for i, cat in enumerate(all_categories))
+        self.states.set(chat_id, {'step': 'category', 'category_ids': [cat.id for cat in all_categories]})
+        return f"Выберите номер категории:\n{categories}"
+
+    def _handle_goal_creation_step(self, chat_id: int, tg_user: TgUser, user_input: str, state: dict) -> str:
+        """Обрабатывает текущий этап создания цели в зависимости от состояния пользователя"""
+
+        step = state.get('step')
+
+        if step == 'category':
+            try:
+                choice_index = int(user_input) - 1
+                category_ids: list = state.get('category_ids')
+                if 0 <= choice_index < len(category_ids):
+                    selected_category = GoalCategory.objects.filter(
+                        id=category_ids[choice_index], is_deleted=False, board__is_deleted=False).only('title').first()
+                    if not selected_category:
+                        self.states.delete(chat_id)
+                        return "Категория не найдена. Начните заново."
+                    self.states.set(chat_id, {'step': 'title', 'category_id': selected_category.id})
+                    return f"Категория: {selected_category.title}\nВведите название цели:"
+                return "Неверный номер."
+            except ValueError:
+                return "Введите число."
+
+        if step == 'title':
+            if len(user_input) > 155:
+                return "Название слишком длинное (макс. 155 символов)."
+            self.states.set(chat_id, {
+                'step': 'description',
+                'category_id': state['category_id'],
+                'title': user_input
+            })
+            return "Введите описание (или 'нет'):"
+
+        if step == 'description':
+            desc = "" if user_input.lower() in ('нет', 'no', '') else user_input
+            self.states.set(chat_id, {
+                'step': 'due_date',
+                'category_id': state['category_id'],
+                'title': state['title'],
+                'description': desc
+            })
+            return "Дедлайн ДД.ММ.ГГГГ (или 'нет'):"
+
+        if step == 'due_date':
+            due_date = None
+            if user_input.lower() not in ('нет', 'no', ''):
+                try:
+                    due_date = datetime.strptime(user_input.strip(), '%d.%m.%Y').date()
+                except ValueError:
+                    return "Формат: 25.12.2025"
+
+            category = GoalCategory.objects.filter(
+                id=state['category_id'],
+                is_deleted=False
+            ).first()
+            if not category:
+                self.states.delete(chat_id)
+                return "Категория не найдена. Начните заново."
+
+            Goal.objects.create(
+                title=state['title'],
+                description=state.get('description', ''),
+                user=tg_user.user,
+                category=category,
+                status=Status.to_do,
+                due_date=due_date
+            )
+
+            self.states.delete(chat_id)
+            return f"Цель создана!\n{state['title']}\nКатегория: {category.title}"
+
+        return "Ошибка состояния. Используйте /cancel."
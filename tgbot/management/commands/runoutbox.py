@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tgbot.outbox import OutboxWorker
+from tgbot.tg.client import TgClient
+
+
+class Command(BaseCommand):
+    help = 'Отправляет сообщения бота из очереди с учётом лимитов Telegram'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда в очереди нет готовых к отправке сообщений')
+
+    def handle(self, *args, **kwargs) -> None:
+        """Цикл разбора очереди исходящих сообщений"""
+
+        # повторы делает сама очередь, чтобы ожидание retry_after не блокировало другие чаты
+        worker = OutboxWorker(
+            TgClient(max_retries=0),
+            global_rate=settings.TELEGRAM_GLOBAL_RATE,
+            chat_rate=settings.TELEGRAM_CHAT_RATE,
+            retention=timedelta(days=settings.TELEGRAM_OUTBOX_RETENTION_DAYS))
+        self.stdout.write("Очередь отправки запущена")
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    delivered: int = worker.drain_once()
+                except Exception as e:
+                    self.stdout.write(f"Ошибка: {e}")
+                    delivered = 0
+                if not delivered:
+                    time.sleep(kwargs['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(f"\nОчередь остановлена, статистика клиента: {worker.client.stats.snapshot()}")
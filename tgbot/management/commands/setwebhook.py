@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tgbot.state import get_state_store
+from tgbot.tg.client import TgClient
+
+
+class Command(BaseCommand):
+    help = 'Подписывает бота на вебхук /bot/webhook или отключает его'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            'url', nargs='?',
+            help='Адрес вебхука, по умолчанию TELEGRAM_WEBHOOK_URL')
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='Отключить вебхук и вернуться к опросу через runbot')
+        parser.add_argument(
+            '--max-connections', type=int, default=40,
+            help='Сколько параллельных запросов Telegram может отправлять на вебхук')
+
+    def handle(self, *args, **kwargs) -> None:
+        client = TgClient.shared()
+        if kwargs['delete']:
+            client.delete_webhook()
+            self.stdout.write("Вебхук отключён")
+            return
+
+        if not settings.TELEGRAM_WEBHOOK_SECRET:
+            raise CommandError("Задайте TELEGRAM_WEBHOOK_SECRET")
+        if not get_state_store().shared:
+            raise CommandError("Вебхуку нужно общее для воркеров хранилище состояний: "
+                               "задайте TGBOT_STATE_BACKEND=cache и общий CACHE_URL (например, Redis)")
+
+        url: str = kwargs['url'] or settings.TELEGRAM_WEBHOOK_URL
+        client.set_webhook(url, settings.TELEGRAM_WEBHOOK_SECRET, max_connections=kwargs['max_connections'])
+        self.stdout.write(f"Вебхук установлен: {url}")
@@ -0,0 +1,36 @@
+from core.metrics import registry
+
+COMMANDS: tuple = ('/goals', '/create', '/cancel')
+
+UPDATES = registry.counter(
+    'bot_updates_total', 'Обработанные сообщения по способу получения и исходу', ('source', 'outcome'))
+UPDATE_LAG = registry.histogram(
+    'bot_update_lag_seconds', 'Задержка от отправки сообщения пользователем до начала обработки', ('source',))
+COMMAND_DURATION = registry.histogram(
+    'bot_command_duration_seconds', 'Время обработки сообщения по командам', ('command',))
+DISPATCHER_BACKLOG = registry.gauge(
+    'bot_dispatcher_backlog', 'Сообщения, ожидающие обработки в runbot --async')
+
+TELEGRAM_REQUESTS = registry.counter(
+    'bot_telegram_requests_total', 'Ответы Bot API по методам, включая повторённые', ('method',))
+TELEGRAM_DURATION = registry.histogram(
+    'bot_telegram_request_duration_seconds', 'Время запроса к Bot API', ('method',))
+TELEGRAM_ERRORS = registry.counter(
+    'bot_telegram_errors_total', 'Ошибки Bot API: код ответа или network для сетевых ошибок', ('method', 'reason'))
+TELEGRAM_RETRIES = registry.counter(
+    'bot_telegram_retries_total', 'Повторы запросов к Bot API', ('method',))
+
+OUTBOX_MESSAGES = registry.counter(
+    'bot_outbox_messages_total', 'Сообщения очереди отправки: sent, postponed, retry или failed', ('outcome',))
+
+
+def command_label(text: str) -> str:
+    """Метка команды: известная команда, other для прочих команд и dialog для шагов диалога.
+
+    Текст пользователя в метку не попадает, иначе число рядов метрики не ограничено.
+    """
+
+    command: str = text.lower().partition(' ')[0]
+    if command in COMMANDS:
+        return command
+    return 'other' if command.startswith('/') else 'dialog'
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tgbot", "0003_alter_tguser_verification_code"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="tguser",
+            options={},
+        ),
+        migrations.RemoveField(
+            model_name="tguser",
+            name="telegram_user_id",
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="telegram_chat_id",
+            field=models.BigIntegerField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="user",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="username",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name="tguser",
+            name="verification_code",
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tgbot", "0004_alter_tguser_options_remove_tguser_telegram_user_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboundMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("chat_id", models.BigIntegerField(verbose_name="ID чата в Telegram")),
+                ("text", models.TextField(verbose_name="Текст")),
+                (
+                    "idempotency_key",
+                    models.CharField(
+                        blank=True,
+                        max_length=64,
+                        null=True,
+                        unique=True,
+                        verbose_name="Ключ идемпотентности",
+                    ),
+                ),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Ожидает отправки"),
+                            (2, "Отправлено"),
+                            (3, "Ошибка"),
+                        ],
+                        default=1,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Попытки"),
+                ),
+                (
+                    "next_attempt",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Следующая попытка",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, default="", verbose_name="Последняя ошибка"
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "sent",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Дата отправки"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Исходящее сообщение",
+                "verbose_name_plural": "Исходящие сообщения",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt", "id"], name="outbound_due_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tgbot", "0005_outboundmessage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedUpdate",
+            fields=[
+                (
+                    "update_id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="ID обновления"
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Дата получения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Обработанное обновление",
+                "verbose_name_plural": "Обработанные обновления",
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 from core.models import User
 
 
@@ -18,3 +19,42 @@ class TgUser(models.Model):
                 self.verification_code = code
                 self.save(update_fields=['verification_code'])
                 return code
+
+
+class OutboundMessage(models.Model):
+    """Исходящее сообщение бота, ожидающее отправки воркером runoutbox"""
+
+    class Status(models.IntegerChoices):
+        pending = 1, "Ожидает отправки"
+        sent = 2, "Отправлено"
+        failed = 3, "Ошибка"
+
+    chat_id = models.BigIntegerField(verbose_name="ID чата в Telegram")
+    text = models.TextField(verbose_name="Текст")
+    idempotency_key = models.CharField(
+        max_length=64, null=True, blank=True, unique=True, verbose_name="Ключ идемпотентности")
+    status = models.PositiveSmallIntegerField(
+        choices=Status.choices, default=Status.pending, verbose_name="Статус")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попытки")
+    next_attempt = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    last_error = models.TextField(blank=True, default="", verbose_name="Последняя ошибка")
+    created = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    sent = models.DateTimeField(null=True, blank=True, verbose_name="Дата отправки")
+
+    class Meta:
+        verbose_name = "Исходящее сообщение"
+        verbose_name_plural = "Исходящие сообщения"
+        indexes = [
+            models.Index(fields=["status", "next_attempt", "id"], name="outbound_due_idx"),
+        ]
+
+
+class ProcessedUpdate(models.Model):
+    """Обновление Telegram, уже принятое вебхуком; защищает от повторной доставки"""
+
+    update_id = models.BigIntegerField(primary_key=True, verbose_name="ID обновления")
+    created = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Дата получения")
+
+    class Meta:
+        verbose_name = "Обработанное обновление"
+        verbose_name_plural = "Обработанные обновления"
@@ -0,0 +1,200 @@
+import time
+from datetime import timedelta
+import requests
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from .metrics import OUTBOX_MESSAGES
+from .models import OutboundMessage
+from .tg.client import TgClient
+
+MAX_MESSAGE_LENGTH = 4096
+SEPARATOR = "\n\n"
+
+
+def reply_key(update_id: int) -> str:
+    """Ключ идемпотентности ответа на обновление: повторная обработка не отправит ответ дважды"""
+
+    return f"reply:{update_id}"
+
+
+def enqueue_message(chat_id: int, text: str, idempotency_key: str | None = None) -> OutboundMessage:
+    """Ставит сообщение в очередь отправки; повтор с тем же ключом возвращает уже поставленное"""
+
+    if idempotency_key is None:
+        return OutboundMessage.objects.create(chat_id=chat_id, text=text)
+    try:
+        with transaction.atomic():
+            return OutboundMessage.objects.create(chat_id=chat_id, text=text, idempotency_key=idempotency_key)
+    except IntegrityError:
+        return OutboundMessage.objects.get(idempotency_key=idempotency_key)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не более capacity подряд"""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def wait_time(self) -> float:
+        """Сколько секунд ждать до появления токена"""
+
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def consume(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def acquire(self) -> None:
+        """Забирает токен, при необходимости дожидаясь его"""
+
+        while not self.consume():
+            time.sleep(self.wait_time())
+
+
+class OutboxWorker:
+    """Отправляет сообщения из очереди OutboundMessage с учётом лимитов Telegram.
+
+    Сообщения забираются пачкой под аренду (next_attempt сдвигается на LEASE),
+    поэтому несколько воркеров не отправят одно сообщение дважды. Подряд идущие
+    сообщения одного чата склеиваются в одно. Чаты без свободного токена
+    откладываются до его появления, ошибки отправки повторяются с экспоненциальной задержкой.
+    Каждые PRUNE_EVERY пачек отправленные и неудавшиеся сообщения старше retention удаляются.
+    """
+
+    LEASE = timedelta(seconds=60)
+    MAX_TRACKED_CHATS = 10000
+    PRUNE_EVERY = 1000
+
+    def __init__(self, client: TgClient, global_rate: float = 30, chat_rate: float = 1,
+                 batch_size: int = 100, max_attempts: int = 5, backoff: float = 1.0,
+                 retention: timedelta = timedelta(days=7)) -> None:
+        self.client = client
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.retention = retention
+        self.iterations = 0
+
+    def drain_once(self) -> int:
+        """Отправляет одну пачку готовых сообщений и возвращает число доставленных"""
+
+        self.iterations += 1
+        if self.iterations % self.PRUNE_EVERY == 0:
+            self.prune()
+
+        by_chat: dict[int, list] = {}
+        for message in self._claim():
+            by_chat.setdefault(message.chat_id, []).append(message)
+
+        delivered = 0
+        for chat_id, messages in by_chat.items():
+            bucket: TokenBucket = self._chat_bucket(chat_id)
+            if not bucket.consume():
+                self._postpone(messages, bucket.wait_time())
+                continue
+
+            batch: list = self._merge(messages)
+            if len(batch) < len(messages):
+                self._postpone(messages[len(batch):], 1 / self.chat_rate)
+
+            self.global_bucket.acquire()
+            if self._send(chat_id, batch):
+                delivered += len(batch)
+        return delivered
+
+    def prune(self) -> int:
+        """Удаляет отправленные и неудавшиеся сообщения старше retention и возвращает их число"""
+
+        deleted, _ = OutboundMessage.objects.filter(
+            status__in=[OutboundMessage.Status.sent, OutboundMessage.Status.failed],
+            created__lt=timezone.now() - self.retention).delete()
+        return deleted
+
+    def _claim(self) -> list:
+        now = timezone.now()
+        with transaction.atomic():
+            queryset = OutboundMessage.objects.filter(
+                status=OutboundMessage.Status.pending, next_attempt__lte=now).order_by('id')
+            if connection.features.has_select_for_update_skip_locked:
+                queryset = queryset.select_for_update(skip_locked=True)
+            messages: list = list(queryset[:self.batch_size])
+            OutboundMessage.objects.filter(id__in=[message.id for message in messages]).update(
+                next_attempt=now + self.LEASE)
+        return messages
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        if len(self.chat_buckets) > self.MAX_TRACKED_CHATS:
+            self.chat_buckets = {key: bucket for key, bucket in self.chat_buckets.items() if not bucket.is_full}
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, 1)
+        return self.chat_buckets[chat_id]
+
+    @staticmethod
+    def _merge(messages: list) -> list:
+        """Начало очереди чата, которое помещается в одно сообщение Telegram"""
+
+        batch: list = messages[:1]
+        length: int = len(messages[0].text)
+        for message in messages[1:]:
+            length += len(SEPARATOR) + len(message.text)
+            if length > MAX_MESSAGE_LENGTH:
+                break
+            batch.append(message)
+        return batch
+
+    @staticmethod
+    def _postpone(messages: list, delay: float) -> None:
+        OUTBOX_MESSAGES.inc(len(messages), outcome='postponed')
+        OutboundMessage.objects.filter(id__in=[message.id for message in messages]).update(
+            next_attempt=timezone.now() + timedelta(seconds=delay))
+
+    def _send(self, chat_id: int, batch: list) -> bool:
+        try:
+            self.client.send_message(chat_id, SEPARATOR.join(message.text for message in batch))
+        except requests.RequestException as e:
+            self._fail(batch, e)
+            return False
+
+        OutboundMessage.objects.filter(id__in=[message.id for message in batch]).update(
+            status=OutboundMessage.Status.sent, sent=timezone.now(), last_error="")
+        OUTBOX_MESSAGES.inc(len(batch), outcome='sent')
+        return True
+
+    def _fail(self, batch: list, error: requests.RequestException) -> None:
+        """Планирует повтор; ошибки 4xx кроме 429 (бот заблокирован, чат не найден) не повторяются"""
+
+        status_code: int | None = getattr(error.response, 'status_code', None)
+        permanent: bool = status_code is not None and 400 <= status_code < 500 and status_code != 429
+        retry_after: float | None = TgClient.retry_after(error)
+        now = timezone.now()
+        for message in batch:
+            message.attempts += 1
+            message.last_error = str(error)
+            if permanent or message.attempts >= self.max_attempts:
+                message.status = OutboundMessage.Status.failed
+                OUTBOX_MESSAGES.inc(outcome='failed')
+            else:
+                OUTBOX_MESSAGES.inc(outcome='retry')
+                delay: float = retry_after if retry_after is not None else self.backoff * 2 ** (message.attempts - 1)
+                message.next_attempt = now + timedelta(seconds=delay)
+        OutboundMessage.objects.bulk_update(batch, ['attempts', 'last_error', 'status', 'next_attempt'])
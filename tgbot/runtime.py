@@ -0,0 +1,122 @@
+import asyncio
+from collections import defaultdict, deque
+from typing import Awaitable, Callable
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from .handlers import reply_to_update
+from .metrics import DISPATCHER_BACKLOG
+from .tg.client import TgClient
+from .tg.dc import UpdateObj
+
+
+class ChatDispatcher:
+    """Раздаёт обновления ограниченному пулу воркеров.
+
+    Обновления одного чата обрабатываются строго по порядку одним воркером,
+    обновления разных чатов — параллельно, но не более чем в workers задачах.
+    """
+
+    def __init__(self, handler: Callable[[UpdateObj], Awaitable[None]], workers: int) -> None:
+        self.handler = handler
+        self.workers = workers
+        self._pending: dict[int, deque] = defaultdict(deque)
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.backlog = 0
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, chat_id: int, update: UpdateObj) -> None:
+        """Ставит обновление в очередь чата; чат попадает в очередь готовых, только если его никто не обрабатывает"""
+
+        is_idle = chat_id not in self._pending
+        self._pending[chat_id].append(update)
+        self.backlog += 1
+        DISPATCHER_BACKLOG.set(self.backlog)
+        if is_idle:
+            self._ready.put_nowait(chat_id)
+
+    async def join(self) -> None:
+        """Ожидает обработки всех поставленных обновлений"""
+
+        await self._ready.join()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id: int = await self._ready.get()
+            pending: deque = self._pending[chat_id]
+            try:
+                while pending:
+                    await self.handler(pending[0])
+                    pending.popleft()
+                    self.backlog -= 1
+                    DISPATCHER_BACKLOG.set(self.backlog)
+            finally:
+                del self._pending[chat_id]
+                self._ready.task_done()
+
+
+class AsyncBotRunner:
+    """Асинхронный цикл бота: опрос getUpdates и параллельная обработка чатов.
+
+    Работа с ORM выполняется в пуле потоков через sync_to_async, поэтому медленный
+    запрос в одном чате не блокирует остальные. Ответы ставятся в очередь
+    отправки, которую разбирает runoutbox.
+    """
+
+    def __init__(self, command, client: TgClient, workers: int = 8, poll_timeout: int = 10) -> None:
+        self.command = command
+        self.client = client
+        self.workers = workers
+        self.poll_timeout = poll_timeout
+        self.max_backlog = workers * 100
+        self._process = sync_to_async(self._process_message, thread_sensitive=False)
+
+    async def run(self, max_polls: int | None = None) -> None:
+        """Опрашивает Telegram; max_polls ограничивает число опросов (для тестов и разовых прогонов)"""
+
+        dispatcher = ChatDispatcher(self._handle, self.workers)
+        dispatcher.start()
+        offset = 0
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                polls += 1
+                if dispatcher.backlog >= self.max_backlog:
+                    await dispatcher.join()
+                try:
+                    response = await asyncio.to_thread(self.client.get_updates, offset, self.poll_timeout)
+                except Exception as e:
+                    self.command.stdout.write(f"Ошибка: {e}")
+                    await asyncio.sleep(5)
+                    continue
+
+                if response.ok:
+                    for update in response.result:
+                        offset = update.update_id + 1
+                        if update.message and update.message.text:
+                            dispatcher.submit(update.message.chat.id, update)
+            await dispatcher.join()
+        finally:
+            await dispatcher.stop()
+
+    async def _handle(self, update: UpdateObj) -> None:
+        try:
+            await self._process(update)
+        except Exception as e:
+            self.command.stdout.write(f"Ошибка обработки сообщения {update.update_id}: {e}")
+
+    def _process_message(self, update: UpdateObj) -> None:
+        """Обрабатывает сообщение в потоке пула и ставит ответ в очередь, соблюдая жизненный цикл соединений с БД"""
+
+        close_old_connections()
+        try:
+            reply_to_update(update, self.command._process_message)
+        finally:
+            close_old_connections()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from goals.models import Goal
+from tgbot.goal_pages import invalidate_goal_pages
+
+
+@receiver([post_save, post_delete], sender=Goal)
+def reset_goal_pages(sender, instance: Goal, **kwargs) -> None:
+    """Сбрасывает закешированный список целей владельца цели для команды /goals"""
+
+    invalidate_goal_pages(instance.user_id)
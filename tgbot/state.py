@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from core.caches import is_shared_cache
+
+
+class StateStore(ABC):
+    """Хранилище состояний диалогов бота: словарь из id и строк, сериализованный в JSON, с истечением по TTL.
+
+    shared — видят ли состояния все процессы; вебхук принимает обновления одного чата
+    разными воркерами и без общего хранилища теряет шаги диалога.
+    """
+
+    shared: bool = False
+
+    def __init__(self, ttl: int) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.max_state_size = 0
+
+    def get(self, chat_id: int) -> dict | None:
+        raw: str | None = self._get(chat_id)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, chat_id: int, state: dict) -> None:
+        raw: str = json.dumps(state, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self.writes += 1
+            self.max_state_size = max(self.max_state_size, len(raw))
+        self._set(chat_id, raw)
+
+    @abstractmethod
+    def delete(self, chat_id: int) -> None:
+        ...
+
+    def stats(self) -> dict:
+        """Метрики размера состояний: число записей и наибольшее состояние в символах"""
+
+        with self._lock:
+            return {'writes': self.writes, 'max_state_size': self.max_state_size}
+
+    @abstractmethod
+    def _get(self, chat_id: int) -> str | None:
+        ...
+
+    @abstractmethod
+    def _set(self, chat_id: int, raw: str) -> None:
+        ...
+
+
+class MemoryStateStore(StateStore):
+    """LRU в памяти процесса: подходит для одного процесса бота, при max_entries вытесняет давние диалоги"""
+
+    def __init__(self, ttl: int, max_entries: int) -> None:
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._states: OrderedDict[int, tuple[float, str]] = OrderedDict()
+        self.evicted = 0
+
+    def _get(self, chat_id: int) -> str | None:
+        with self._lock:
+            entry = self._states.get(chat_id)
+            if entry is None:
+                return None
+            expires, raw = entry
+            if expires < time.monotonic():
+                del self._states[chat_id]
+                self.evicted += 1
+                return None
+            self._states.move_to_end(chat_id)
+            return raw
+
+    def _set(self, chat_id: int, raw: str) -> None:
+        with self._lock:
+            self._states[chat_id] = (time.monotonic() + self.ttl, raw)
+            self._states.move_to_end(chat_id)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, chat_id: int) -> None:
+        with self._lock:
+            self._states.pop(chat_id, None)
+
+    def stats(self) -> dict:
+        stats: dict = super().stats()
+        with self._lock:
+            stats.update(
+                entries=len(self._states),
+                total_size=sum(len(raw) for _, raw in self._states.values()),
+                evicted=self.evicted)
+        return stats
+
+
+class CacheStateStore(StateStore):
+    """Состояния в кеше Django; с общим кешем (БД, Redis, Memcached) видны всем процессам бота"""
+
+    KEY_PREFIX = 'tgbot:state'
+
+    def __init__(self, ttl: int, alias: str = 'default') -> None:
+        super().__init__(ttl)
+        self.alias = alias
+        self.cache = caches[alias]
+
+    @property
+    def shared(self) -> bool:
+        return is_shared_cache(self.alias)
+
+    def _key(self, chat_id: int) -> str:
+        return f"{self.KEY_PREFIX}:{chat_id}"
+
+    def _get(self, chat_id: int) -> str | None:
+        return self.cache.get(self._key(chat_id))
+
+    def _set(self, chat_id: int, raw: str) -> None:
+        self.cache.set(self._key(chat_id), raw, self.ttl)
+
+    def delete(self, chat_id: int) -> None:
+        self.cache.delete(self._key(chat_id))
+
+
+STATE_BACKENDS: dict = {
+    'memory': lambda: MemoryStateStore(settings.TGBOT_STATE_TTL, settings.TGBOT_STATE_MAX_ENTRIES),
+    'cache': lambda: CacheStateStore(settings.TGBOT_STATE_TTL, settings.TGBOT_STATE_CACHE),
+}
+
+
+def get_state_store() -> StateStore:
+    """Создаёт хранилище по TGBOT_STATE_BACKEND: memory, cache или путь к своему классу"""
+
+    backend: str = settings.TGBOT_STATE_BACKEND
+    if backend in STATE_BACKENDS:
+        return STATE_BACKENDS[backend]()
+    return import_string(backend)(settings.TGBOT_STATE_TTL)
@@ -0,0 +1,467 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from core.models import User
+from goals.models import Board, BoardParticipant, Goal, GoalCategory
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tgbot.management.commands.runbot import Command
+from tgbot.models import OutboundMessage, TgUser
+from tgbot.outbox import SEPARATOR, OutboxWorker, enqueue_message
+from tgbot.goal_pages import GOALS_PAGE_SIZE
+from tgbot.handlers import MessageHandler, reply_to_update
+from tgbot.metrics import COMMAND_DURATION, TELEGRAM_ERRORS, UPDATES, command_label
+from tgbot.runtime import AsyncBotRunner
+from tgbot.state import CacheStateStore, MemoryStateStore, StateStore, get_state_store
+from tgbot.views import TgWebhookView
+from tgbot.tg.client import TgClient
+from tgbot.tg.dc import GetUpdatesResponse
+
+
+class FakeBotApi:
+    """Локальный сервер, имитирующий методы Bot API, которые использует бот"""
+
+    def __init__(self) -> None:
+        self.updates: list = []
+        self.sent: list = []
+        self.errors: list = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self) -> None:
+                super().setup()
+                with api.lock:
+                    api.connections += 1
+
+            def do_GET(self) -> None:
+                self._dispatch()
+
+            def do_POST(self) -> None:
+                self._dispatch()
+
+            def _dispatch(self) -> None:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                status, payload = api.handle(self.path.rsplit('/', 1)[-1].split('?')[0], body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def handle(self, method: str, body: dict) -> tuple[int, dict]:
+        with self.lock:
+            if self.errors:
+                return self.errors.pop(0)
+        if method == 'getUpdates':
+            with self.lock:
+                updates, self.updates = self.updates, []
+            return 200, {'ok': True, 'result': updates}
+        if method == 'sendMessage':
+            with self.lock:
+                self.sent.append(body)
+            message = {'message_id': len(self.sent), 'date': 0,
+                       'chat': {'id': body['chat_id'], 'type': 'private'}, 'text': body['text']}
+            return 200, {'ok': True, 'result': message}
+        return 404, {'ok': False, 'description': 'Not Found'}
+
+    def add_message(self, chat_id: int, text: str) -> None:
+        update_id = len(self.updates) + 1
+        self.updates.append({'update_id': update_id, 'message': {
+            'message_id': update_id, 'date': 0, 'text': text,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'user', 'username': f'user{chat_id}'},
+        }})
+
+
+@pytest.fixture
+def fake_bot_api(settings) -> FakeBotApi:
+    """Запускает фейковый Bot API и направляет в него TgClient"""
+
+    api = FakeBotApi()
+    thread = threading.Thread(target=api.server.serve_forever, daemon=True)
+    thread.start()
+    settings.TELEGRAM_API_URL = api.url
+    settings.TELEGRAM_BACKOFF = 0
+    yield api
+    api.server.shutdown()
+    api.server.server_close()
+
+
+class EchoCommand(Command):
+    """Команда бота без БД: отвечает текстом сообщения и считает параллельные обработки"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def _process_message(self, chat_id: int, username: str, text: str) -> str:
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return text
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(connection.vendor == "sqlite", reason="SQLite блокирует таблицы при параллельной записи из потоков")
+def test_async_runner_keeps_chat_order(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует, что сообщения одного чата обрабатываются по порядку, а разных чатов — параллельно"""
+
+    for i in range(3):
+        for chat_id in (1, 2, 3):
+            fake_bot_api.add_message(chat_id, f"{chat_id}:{i}")
+
+    command = EchoCommand()
+    asyncio.run(AsyncBotRunner(command, TgClient(), workers=3, poll_timeout=0).run(max_polls=1))
+    OutboxWorker(TgClient()).drain_once()
+
+    for chat_id in (1, 2, 3):
+        replies = [message['text'] for message in fake_bot_api.sent if message['chat_id'] == chat_id]
+        assert replies == [SEPARATOR.join(f"{chat_id}:{i}" for i in range(3))]
+    assert command.max_active > 1
+
+
+def test_client_reuses_connections(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует, что последовательные запросы клиента идут через одно keep-alive соединение"""
+
+    client = TgClient()
+    for i in range(5):
+        client.send_message(1, str(i))
+
+    assert len(fake_bot_api.sent) == 5
+    assert fake_bot_api.connections == 1
+    assert client.stats.snapshot()['requests'] == 5
+
+
+def test_client_retries_after_flood_wait(fake_bot_api: FakeBotApi, settings) -> None:
+    """Тестирует повтор запроса после 429 и 5xx и учёт неудач после исчерпания попыток"""
+
+    settings.TELEGRAM_MAX_RETRIES = 2
+    fake_bot_api.errors = [
+        (429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0}}),
+        (502, {'ok': False, 'error_code': 502}),
+    ]
+    client = TgClient()
+
+    response = client.send_message(1, "привет")
+    assert response.ok
+    assert client.stats.snapshot()['retries'] == 2
+
+    fake_bot_api.errors = [(500, {'ok': False, 'error_code': 500})] * 3
+    with pytest.raises(requests.HTTPError):
+        client.send_message(1, "привет")
+    stats = client.stats.snapshot()
+    assert stats['retries'] == 4
+    assert stats['failures'] == 1
+    assert fake_bot_api.sent == [{'chat_id': 1, 'text': "привет"}]
+
+
+@pytest.mark.django_db
+def test_outbox_merges_and_rate_limits(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует склейку сообщений чата, лимит на чат и идемпотентность постановки в очередь"""
+
+    for text in ("первое", "второе"):
+        enqueue_message(1, text)
+    enqueue_message(2, "ответ", idempotency_key="reply:1")
+    enqueue_message(2, "ответ", idempotency_key="reply:1")
+    worker = OutboxWorker(TgClient())
+
+    assert worker.drain_once() == 3
+    assert fake_bot_api.sent == [
+        {'chat_id': 1, 'text': f"первое{SEPARATOR}второе"},
+        {'chat_id': 2, 'text': "ответ"},
+    ]
+
+    late = enqueue_message(1, "третье")
+    assert worker.drain_once() == 0
+    late.refresh_from_db()
+    assert late.status == OutboundMessage.Status.pending
+    assert len(fake_bot_api.sent) == 2
+
+
+@pytest.mark.django_db
+def test_outbox_retries_and_gives_up(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует перенос отправки после 429 и отказ от повторов при 403"""
+
+    message = enqueue_message(1, "привет")
+    worker = OutboxWorker(TgClient(max_retries=0))
+
+    fake_bot_api.errors = [(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0}})]
+    assert worker.drain_once() == 0
+    message.refresh_from_db()
+    assert (message.status, message.attempts) == (OutboundMessage.Status.pending, 1)
+
+    worker.chat_buckets.clear()
+    fake_bot_api.errors = [(403, {'ok': False, 'error_code': 403, 'description': 'bot was blocked by the user'})]
+    assert worker.drain_once() == 0
+    message.refresh_from_db()
+    assert (message.status, message.attempts) == (OutboundMessage.Status.failed, 2)
+    assert fake_bot_api.sent == []
+
+
+@pytest.mark.django_db
+def test_outbox_prunes_old_messages(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует, что воркер раз в PRUNE_EVERY пачек удаляет старые отправленные и неудавшиеся сообщения"""
+
+    statuses = (OutboundMessage.Status.sent, OutboundMessage.Status.failed, OutboundMessage.Status.pending)
+    old = [OutboundMessage.objects.create(chat_id=1, text="старое", status=status) for status in statuses]
+    OutboundMessage.objects.filter(id__in=[message.id for message in old]).update(
+        created=timezone.now() - timedelta(days=8), next_attempt=timezone.now() + timedelta(days=1))
+    recent = OutboundMessage.objects.create(chat_id=1, text="новое", status=OutboundMessage.Status.sent)
+    worker = OutboxWorker(TgClient(), retention=timedelta(days=7))
+
+    worker.drain_once()
+    assert OutboundMessage.objects.count() == 4
+    worker.iterations = worker.PRUNE_EVERY - 1
+    worker.drain_once()
+    assert set(OutboundMessage.objects.values_list("id", flat=True)) == {old[2].id, recent.id}
+
+
+@pytest.mark.django_db
+def test_verify_enqueues_notification(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует, что верификация не ждёт Telegram, а ставит уведомление в очередь"""
+
+    user = User.objects.create_user(username="user1", password="pass123")
+    TgUser.objects.create(telegram_chat_id=42, username="tg", verification_code="CODE")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.patch("/bot/verify", {"verification_code": "CODE"}, format="json")
+
+    assert response.status_code == 200
+    assert fake_bot_api.sent == []
+    assert OutboundMessage.objects.get(chat_id=42).text.endswith("@user1")
+
+
+@pytest.mark.django_db
+def test_webhook_validates_secret_and_deduplicates(settings, tmp_path, monkeypatch) -> None:
+    """Тестирует проверку секрета вебхука, отказ без общего хранилища состояний и однократную обработку"""
+
+    client = APIClient()
+    update = {'update_id': 7, 'message': {
+        'message_id': 1, 'date': 0, 'text': "привет",
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'user', 'username': 'tg'},
+    }}
+
+    assert client.post("/bot/webhook", update, format="json").status_code == 404
+
+    settings.TELEGRAM_WEBHOOK_SECRET = "secret"
+    response = client.post("/bot/webhook", update, format="json", HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN="wrong")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(TgWebhookView, "handler", MessageHandler(MemoryStateStore(ttl=60, max_entries=10)))
+    with pytest.raises(ImproperlyConfigured):
+        client.post("/bot/webhook", update, format="json", HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN="secret")
+    assert not TgUser.objects.exists()
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)}}
+    monkeypatch.setattr(TgWebhookView, "handler", MessageHandler(CacheStateStore(ttl=60)))
+
+    for _ in range(2):
+        response = client.post(
+            "/bot/webhook", update, format="json", HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN="secret")
+        assert response.status_code == 200
+
+    tg_user = TgUser.objects.get(telegram_chat_id=42)
+    reply = OutboundMessage.objects.get(chat_id=42)
+    assert tg_user.verification_code in reply.text
+    assert reply.idempotency_key == "reply:7"
+
+
+class IncompleteStateStore(StateStore):
+    """Хранилище без delete: должно отвергаться при создании"""
+
+    def _get(self, chat_id: int) -> str | None:
+        return None
+
+    def _set(self, chat_id: int, raw: str) -> None:
+        pass
+
+
+def test_incomplete_state_store_fails_on_creation(settings) -> None:
+    """Тестирует, что хранилище без всех методов не создаётся, а не падает посреди диалога"""
+
+    settings.TGBOT_STATE_BACKEND = "tgbot.tests.IncompleteStateStore"
+    with pytest.raises(TypeError):
+        get_state_store()
+
+
+def test_memory_state_store_expires_and_evicts() -> None:
+    """Тестирует вытеснение давних диалогов, истечение TTL и метрики размера"""
+
+    store = MemoryStateStore(ttl=60, max_entries=2)
+    for chat_id in (1, 2, 3):
+        store.set(chat_id, {'step': 'title', 'category_id': chat_id})
+
+    assert store.get(1) is None
+    assert store.get(3) == {'step': 'title', 'category_id': 3}
+    stats = store.stats()
+    assert (stats['entries'], stats['evicted'], stats['writes']) == (2, 1, 3)
+    assert stats['total_size'] == 2 * stats['max_state_size']
+
+    expired = MemoryStateStore(ttl=-1, max_entries=2)
+    expired.set(1, {'step': 'title'})
+    assert expired.get(1) is None
+
+
+@pytest.mark.django_db
+def test_bot_hides_deleted_board() -> None:
+    """Тестирует, что /create и /goals не показывают категории и цели удалённой доски, пока её архивирует runjobs"""
+
+    user = User.objects.create_user(username="user1", password="pass123")
+    board = Board.objects.create(title="Доска")
+    BoardParticipant.objects.create(board=board, user=user, role=BoardParticipant.Role.owner)
+    category = GoalCategory.objects.create(title="Работа", board=board, user=user)
+    Goal.objects.create(title="Отчёт", category=category, user=user)
+    TgUser.objects.create(telegram_chat_id=42, user=user)
+    handler = MessageHandler(MemoryStateStore(ttl=60, max_entries=10))
+    assert "1. Работа" in handler.process(chat_id=42, username="tg", text="/create")
+
+    # доска скрыта, а категории и цели ещё не тронуты фоновой задачей
+    Board.objects.filter(pk=board.pk).update(is_deleted=True)
+    assert handler.process(chat_id=42, username="tg", text="1") == "Категория не найдена. Начните заново."
+    assert handler.process(chat_id=42, username="tg", text="/create").startswith("У вас нет категорий")
+    assert handler.process(chat_id=42, username="tg", text="/goals") == "У вас нет активных целей."
+
+
+@pytest.mark.django_db
+def test_goal_creation_dialog_shared_between_processes() -> None:
+    """Тестирует, что диалог /create продолжается другим процессом бота через общее хранилище"""
+
+    user = User.objects.create_user(username="user1", password="pass123")
+    board = Board.objects.create(title="Доска")
+    BoardParticipant.objects.create(board=board, user=user, role=BoardParticipant.Role.owner)
+    category = GoalCategory.objects.create(title="Работа", board=board, user=user)
+    TgUser.objects.create(telegram_chat_id=42, user=user)
+
+    first, second = MessageHandler(CacheStateStore(ttl=60)), MessageHandler(CacheStateStore(ttl=60))
+    assert "1. Работа" in first.process(chat_id=42, username="tg", text="/create")
+    assert first.states.get(42) == {'step': 'category', 'category_ids': [category.id]}
+    assert "Работа" in second.process(chat_id=42, username="tg", text="1")
+    first.process(chat_id=42, username="tg", text="Отчёт")
+    second.process(chat_id=42, username="tg", text="нет")
+    assert first.process(chat_id=42, username="tg", text="нет").endswith("Категория: Работа")
+
+    assert Goal.objects.get(category=category).title == "Отчёт"
+    assert second.states.get(42) is None
+
+
+def test_updates_decoding_reads_declared_fields() -> None:
+    """Тестирует разбор getUpdates: поле from, вложенные списки и пропуск незнакомых ключей"""
+
+    response = GetUpdatesResponse.from_dict({'ok': True, 'result': [{
+        'update_id': 5,
+        'callback_query': {'id': 'ignored'},
+        'message': {
+            'message_id': 1, 'date': 0, 'text': "/goals", 'photo': [{'file_id': 'ignored'}],
+            'chat': {'id': 42, 'type': 'private'},
+            'from': {'id': 42, 'is_bot': False, 'first_name': 'user', 'username': 'tg', 'is_premium': True},
+            'entities': [{'offset': 0, 'length': 6, 'type': 'bot_command'}],
+        },
+    }]})
+
+    message = response.result[0].message
+    assert (message.chat.id, message.from_.username, message.text) == (42, 'tg', "/goals")
+    assert message.entities[0].type == 'bot_command'
+    assert response.result[0].edited_message is None
+    assert not hasattr(message, '__dict__')
+
+    with pytest.raises(KeyError):
+        GetUpdatesResponse.from_dict({'ok': True, 'result': [{'message': {}}]})
+
+
+@pytest.mark.django_db
+def test_goals_command_pages_and_caches(settings, tmp_path) -> None:
+    """Тестирует постраничный /goals, повтор страницы из общего кеша и сброс кеша при изменении цели"""
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)}}
+
+    user = User.objects.create_user(username="user1", password="pass123")
+    board = Board.objects.create(title="Доска")
+    category = GoalCategory.objects.create(title="Работа", board=board, user=user)
+    TgUser.objects.create(telegram_chat_id=42, user=user)
+    Goal.objects.bulk_create(
+        Goal(title=f"Цель {i}", description="д" * 80, category=category, board=board, user=user)
+        for i in range(GOALS_PAGE_SIZE + 2))
+    handler = MessageHandler(MemoryStateStore(ttl=60, max_entries=10))
+
+    first_page = handler.process(chat_id=42, username="tg", text="/goals")
+    assert first_page.count("**Цель") == GOALS_PAGE_SIZE
+    assert f"{'д' * 50}...\n" in first_page
+    assert first_page.endswith("/goals 2")
+
+    with CaptureQueriesContext(connection) as queries:
+        second_page = handler.process(chat_id=42, username="tg", text="/goals 2")
+        assert handler.process(chat_id=42, username="tg", text="/goals 2") == second_page
+    assert second_page.count("**Цель") == 2
+    assert sum("goals_goal" in query['sql'] for query in queries.captured_queries) == 1
+
+    Goal.objects.create(title="Новая", category=category, user=user)
+    assert "**Новая**" in handler.process(chat_id=42, username="tg", text="/goals")
+    assert "положительным" in handler.process(chat_id=42, username="tg", text="/goals 0")
+
+
+@pytest.mark.django_db
+def test_goals_command_without_shared_cache() -> None:
+    """Тестирует, что с кешем своего процесса /goals сразу видит цели, изменённые API в другом процессе"""
+
+    user = User.objects.create_user(username="user1", password="pass123")
+    board = Board.objects.create(title="Доска")
+    category = GoalCategory.objects.create(title="Работа", board=board, user=user)
+    TgUser.objects.create(telegram_chat_id=42, user=user)
+    goal = Goal.objects.create(title="Старая", category=category, user=user)
+    handler = MessageHandler(MemoryStateStore(ttl=60, max_entries=10))
+    assert "**Старая**" in handler.process(chat_id=42, username="tg", text="/goals")
+
+    # update() не отправляет сигналов, как и сохранение цели в процессе API
+    Goal.objects.filter(pk=goal.pk).update(title="Новая")
+    assert "**Новая**" in handler.process(chat_id=42, username="tg", text="/goals")
+
+
+@pytest.mark.django_db
+def test_bot_metrics(fake_bot_api: FakeBotApi) -> None:
+    """Тестирует метрики ошибок Bot API, обработанных сообщений и времени команд"""
+
+    errors_before = TELEGRAM_ERRORS.values.get(('sendMessage', '429'), 0)
+    updates_before = UPDATES.values.get(('polling', 'ok'), 0)
+    goals_before = COMMAND_DURATION.values.get(('/goals',), [[], 0, 0])[2]
+
+    fake_bot_api.errors = [(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 0}})]
+    TgClient().send_message(1, "привет")
+    fake_bot_api.add_message(5, "/goals 2")
+    update = TgClient().get_updates(timeout=0).result[0]
+    reply_to_update(update, lambda chat_id, username, text: "ответ")
+
+    assert TELEGRAM_ERRORS.values[('sendMessage', '429')] == errors_before + 1
+    assert UPDATES.values[('polling', 'ok')] == updates_before + 1
+    assert COMMAND_DURATION.values[('/goals',)][2] == goals_before + 1
+    assert command_label("/create") == "/create"
+    assert command_label("/секрет") == "other"
+    assert command_label("Купить молоко") == "dialog"
@@ -1,27 +1,141 @@
+import threading
+import time
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from ..metrics import TELEGRAM_DURATION, TELEGRAM_ERRORS, TELEGRAM_REQUESTS, TELEGRAM_RETRIES
 from .dc import GetUpdatesResponse, SendMessageResponse
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ClientStats:
+    """Потокобезопасные счётчики запросов клиента к Telegram"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'avg_latency': self.total_latency / self.requests if self.requests else 0.0,
+                'max_latency': self.max_latency,
+            }
+
 
 class TgClient:
-    def __init__(self):
-        self.base_url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/"
+    """Клиент Bot API с пулом keep-alive соединений и повторами с экспоненциальной задержкой"""
+
+    _shared: 'TgClient | None' = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_retries: int | None = None):
+        self.base_url = f"{settings.TELEGRAM_API_URL}/bot{settings.TELEGRAM_BOT_TOKEN}/"
+        self.connect_timeout: float = settings.TELEGRAM_CONNECT_TIMEOUT
+        self.read_timeout: float = settings.TELEGRAM_READ_TIMEOUT
+        self.max_retries: int = settings.TELEGRAM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff: float = settings.TELEGRAM_BACKOFF
+        self.stats = ClientStats()
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.TELEGRAM_POOL_SIZE)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def shared(cls) -> 'TgClient':
+        """Возвращает общий для процесса клиент, чтобы соединения переиспользовались между вызовами"""
 
-    def _get(self, method: str, params: dict = None) -> dict[str]:
-        req = requests.get(self.base_url + method, params=params, timeout=60)
-        req.raise_for_status()
-        return req.json()
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def _request(self, http_method: str, method: str, read_timeout: float | None = None, **kwargs) -> dict[str]:
+        """Выполняет запрос, повторяя его при сетевых ошибках, 429 и 5xx.
+
+        Для 429 выжидается retry_after из ответа Telegram, иначе задержка растёт как backoff * 2^attempt.
+        """
+
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        for attempt in range(self.max_retries + 1):
+            start = time.monotonic()
+            try:
+                response = self.session.request(http_method, self.base_url + method, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                TELEGRAM_ERRORS.inc(method=method, reason='network')
+                if attempt == self.max_retries:
+                    self.stats.record_failure()
+                    raise
+                delay = self.backoff * 2 ** attempt
+            else:
+                latency: float = time.monotonic() - start
+                self.stats.record(latency)
+                TELEGRAM_REQUESTS.inc(method=method)
+                TELEGRAM_DURATION.observe(latency, method=method)
+                if response.status_code >= 400:
+                    TELEGRAM_ERRORS.inc(method=method, reason=response.status_code)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError:
+                        self.stats.record_failure()
+                        raise
+                    return response.json()
+                delay = self._retry_after(response) or self.backoff * 2 ** attempt
+
+            self.stats.record_retry()
+            TELEGRAM_RETRIES.inc(method=method)
+            time.sleep(delay)
+
+    @classmethod
+    def retry_after(cls, error: Exception) -> float | None:
+        """Время ожидания из ответа Telegram на ошибку 429, если оно указано"""
+
+        response = getattr(error, 'response', None)
+        return cls._retry_after(response) if response is not None else None
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        try:
+            return response.json().get('parameters', {}).get('retry_after')
+        except ValueError:
+            return None
+
+    def _get(self, method: str, params: dict = None, read_timeout: float | None = None) -> dict[str]:
+        return self._request('GET', method, read_timeout=read_timeout, params=params)
 
     def _post(self, method: str, json: dict = None) -> dict[str]:
-        req = requests.post(self.base_url + method, json=json, timeout=60)
-        req.raise_for_status()
-        return req.json()
+        return self._request('POST', method, json=json)
 
     def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
         """Чтение сообщений ботом"""
 
         return GetUpdatesResponse.from_dict(
-            self._get('getUpdates', {'offset': offset, 'timeout': timeout}))
+            self._get('getUpdates', {'offset': offset, 'timeout': timeout}, read_timeout=timeout + self.read_timeout))
 
     def send_message(self, chat_id: int, text: str) -> SendMessageResponse:
         """Отправка сообщений ботом - пользователю"""
@@ -29,6 +143,21 @@ class TgClient:
         payload: dict = {'chat_id': chat_id, 'text': text}
         return SendMessageResponse.from_dict(self._post('sendMessage', payload))
 
+    def set_webhook(self, url: str, secret_token: str, max_connections: int = 40) -> dict[str]:
+        """Подписка бота на доставку обновлений вебхуком"""
+
+        return self._post('setWebhook', {
+            'url': url,
+            'secret_token': secret_token,
+            'max_connections': max_connections,
+            'allowed_updates': ['message'],
+        })
+
+    def delete_webhook(self) -> dict[str]:
+        """Отключение вебхука для возврата к getUpdates"""
+
+        return self._post('deleteWebhook')
+
     def get_me(self) -> dict[str]:
         """Получить информацию о боте"""
 
@@ -1,11 +1,48 @@
-from dataclasses import dataclass, field
-from typing import List, Optional
-from dataclasses_json import dataclass_json, config
-from marshmallow import EXCLUDE
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Callable, List, Optional, Union, get_args, get_origin, get_type_hints
 
 
-@dataclass_json
-@dataclass
+def _value_decoder(tp) -> Callable | None:
+    """Преобразователь значения поля: from_dict для вложенных объектов, None для примитивов"""
+
+    if get_origin(tp) is Union:
+        tp = next(arg for arg in get_args(tp) if arg is not type(None))
+    if get_origin(tp) is list:
+        item: Callable | None = _value_decoder(get_args(tp)[0])
+        return (lambda items: [item(value) for value in items]) if item else None
+    return getattr(tp, 'from_dict', None)
+
+
+def decodable(cls: type) -> type:
+    """Добавляет dataclass метод from_dict с заранее составленным планом разбора.
+
+    План строится один раз при объявлении класса, а не при каждом сообщении:
+    читаются только объявленные поля, остальные ключи ответа Telegram
+    (фото, ответы, клавиатуры) не разбираются вовсе.
+    """
+
+    hints: dict = get_type_hints(cls)
+    plan: list = []
+    for cls_field in fields(cls):
+        key: str = cls_field.metadata.get('key', cls_field.name)
+        required: bool = cls_field.default is MISSING and cls_field.default_factory is MISSING
+        plan.append((cls_field.name, key, _value_decoder(hints[cls_field.name]), required))
+
+    def from_dict(data: dict):
+        kwargs: dict = {}
+        for name, key, convert, required in plan:
+            value = data.get(key) if not required else data[key]
+            if value is not None:
+                kwargs[name] = convert(value) if convert else value
+        return cls(**kwargs)
+
+    from_dict.__qualname__ = f"{cls.__qualname__}.from_dict"
+    cls.from_dict = staticmethod(from_dict)
+    return cls
+
+
+@decodable
+@dataclass(slots=True)
 class Chat:
     id: int
     type: str
@@ -15,8 +52,8 @@ class Chat:
     title: Optional[str] = None
 
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class MessageFrom:
     id: int
     is_bot: bool
@@ -26,35 +63,27 @@ class MessageFrom:
     language_code: Optional[str] = None
 
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class Entity:
     offset: int
     length: int
     type: str
 
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class Message:
     message_id: int
     date: int
     chat: Chat
-
-    from_: Optional[MessageFrom] = field(
-        default=None,
-        metadata=config(
-            field_name="from",
-            letter_case=lambda x: "from"
-        )
-    )
-
+    from_: Optional[MessageFrom] = field(default=None, metadata={'key': 'from'})
     text: Optional[str] = None
     entities: Optional[List[Entity]] = None
 
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class UpdateObj:
     update_id: int
     message: Optional[Message] = None
@@ -63,28 +92,22 @@ class UpdateObj:
     edited_channel_post: Optional[Message] = None
 
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class GetUpdatesResponse:
     ok: bool
     result: List[UpdateObj]
 
-    class Meta:
-        unknown = EXCLUDE
 
-
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class SendMessageResponse:
     ok: bool
     result: Message
 
-    class Meta:
-        unknown = EXCLUDE
-
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class User:
     id: int
     is_bot: bool
@@ -95,11 +118,8 @@ class User:
     supports_inline_queries: Optional[bool] = None
 
 
-@dataclass_json
-@dataclass
+@decodable
+@dataclass(slots=True)
 class GetMeResponse:
     ok: bool
     result: User
-
-    class Meta:
-        unknown = EXCLUDE
@@ -1,4 +1,7 @@
 from django.urls import path
-from .views import TgUserVerifyView
+from .views import TgUserVerifyView, TgWebhookView
 
-urlpatterns = [path('verify', TgUserVerifyView.as_view(), name='bot_verify'), ]
+urlpatterns = [
+    path('verify', TgUserVerifyView.as_view(), name='bot_verify'),
+    path('webhook', TgWebhookView.as_view(), name='bot_webhook'),
+]
@@ -1,10 +1,23 @@
+import hmac
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework.request import Request
-from rest_framework.permissions import IsAuthenticated
-from .models import TgUser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from .handlers import MessageHandler, reply_to_update
+from .models import ProcessedUpdate, TgUser
 from .serializers import TgUserVerifySerializer
-from .tg.client import TgClient
+from .outbox import enqueue_message
+from .tg.dc import UpdateObj
+
+logger = logging.getLogger(__name__)
 
 
 class TgUserVerifyView(GenericAPIView):
@@ -28,7 +41,7 @@ class TgUserVerifyView(GenericAPIView):
             tg_user.user = request.user
             tg_user.save(update_fields=['user'])
 
-            TgClient().send_message(
+            enqueue_message(
                 tg_user.telegram_chat_id,
                 "Аккаунт успешно привязан к пользователю @" + request.user.username)
 
@@ -42,3 +55,51 @@ class TgUserVerifyView(GenericAPIView):
 
         except TgUser.DoesNotExist:
             return Response({"error": "Неверный код"}, status=400)
+
+
+class TgWebhookView(APIView):
+    """Приём обновлений Telegram вебхуком вместо опроса getUpdates"""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    handler = MessageHandler()
+    SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+    PROCESSED_TTL = timedelta(days=2)  # Telegram перестаёт повторять доставку раньше
+    PRUNE_EVERY = 1000
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        """Проверяет секрет, отбрасывает повторные доставки и обрабатывает сообщение"""
+
+        secret: str = settings.TELEGRAM_WEBHOOK_SECRET
+        if not secret:
+            raise NotFound()
+        if not hmac.compare_digest(request.headers.get(self.SECRET_HEADER, ''), secret):
+            raise PermissionDenied("Неверный секрет вебхука")
+        if not self.handler.states.shared:
+            # обновления одного чата приходят в разные воркеры: с состояниями в памяти процесса диалоги теряют шаги
+            raise ImproperlyConfigured(
+                "Вебхуку нужно общее хранилище состояний: TGBOT_STATE_BACKEND=cache и общий CACHE_URL")
+
+        try:
+            update: UpdateObj = UpdateObj.from_dict(request.data)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise ValidationError("Некорректное обновление")
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    ProcessedUpdate.objects.create(update_id=update.update_id)
+            except IntegrityError:
+                return Response({"ok": True})
+
+            if update.message and update.message.text:
+                try:
+                    with transaction.atomic():
+                        reply_to_update(update, self.handler.process, source='webhook')
+                except Exception:
+                    # повтор от Telegram не поможет: ошибка записывается, обновление считается принятым
+                    logger.exception("Ошибка обработки обновления %s", update.update_id)
+
+        if update.update_id % self.PRUNE_EVERY == 0:
+            ProcessedUpdate.objects.filter(created__lt=timezone.now() - self.PROCESSED_TTL).delete()
+        return Response({"ok": True})